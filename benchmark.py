@@ -0,0 +1,268 @@
+# benchmark.py
+#
+# Throughput benchmark for the migration and update jobs. Each job runs in its
+# own process against freshly generated synthetic data (see synthetic_data.py),
+# and the results are printed as JSON together with the git commit, so runs
+# from different commits can be compared with --baseline.
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+# (name, dbops task, task options); every job except the migration itself
+# runs on rows that an unmeasured migrate-properties run has just written.
+BENCHMARK_JOBS = [
+    ('migrate-properties', 'migrate-properties', []),
+    ('migrate-properties-stream', 'migrate-properties', ['--stream']),
+    ('update-bedrooms', 'update-bedrooms', []),
+    ('update-price', 'update-price', []),
+    ('update-currency', 'update-currency', []),
+    ('update-property-type', 'update-property-type', []),
+    ('populate-county-name', 'populate-county-name', []),
+    ('transform-pipeline', 'transform-pipeline', []),
+]
+
+# Logical databases redirected to the benchmark database in the job processes
+BENCHMARK_DATABASES = ('archstone_test',)
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def setup_logging():
+    """
+    Configures logging to the console; stdout is reserved for the JSON report.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+def peak_rss_kb():
+    """
+    Returns the peak resident set size of this process and its finished children in KiB,
+    or None where the resource module is unavailable (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def measure_task(task, argv, database_url):
+    """
+    Runs one dbops task in this process and measures it. Used inside the job process.
+
+    Returns:
+        dict: wall_time_s, statements, peak_rss_kb and exit_code.
+    """
+    import config
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from dbops import run_task
+
+    for name in BENCHMARK_DATABASES:
+        config.DATABASES[name]['url'] = database_url
+    # Always reflect live, so statement counts do not depend on which job warmed the schema cache
+    config.SCHEMA_CACHE_DIR = None
+
+    counts = {'statements': 0}
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counts['statements'] += 1
+
+    exit_code = 0
+    start = time.perf_counter()
+    try:
+        run_task(task, argv)
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    wall_time = time.perf_counter() - start
+    return {
+        'wall_time_s': round(wall_time, 4),
+        'statements': counts['statements'],
+        'peak_rss_kb': peak_rss_kb(),
+        'exit_code': exit_code,
+    }
+
+def run_job_process(task, argv, database_url, workdir):
+    """
+    Runs measure_task() in a fresh Python process so peak RSS and imports are per job.
+
+    The job's log files are written to workdir instead of the repository.
+    """
+    spec = json.dumps({'task': task, 'argv': argv, 'database_url': database_url})
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])))
+    completed = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, 'benchmark.py'), '--job-spec', spec],
+        cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    if completed.returncode != 0 or not completed.stdout.strip():
+        raise RuntimeError(f"Job process for '{task}' failed with exit code {completed.returncode}.")
+    # The job's own console logging goes to stdout too; the result is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def absolute_database_url(database_url):
+    """
+    Makes a relative SQLite file path absolute, since job processes run in a scratch directory.
+    """
+    from sqlalchemy.engine import make_url
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        url = url.set(database=os.path.abspath(url.database))
+    return url.render_as_string(hide_password=False)
+
+def git_revision():
+    """
+    Returns (commit hash, dirty flag) of the working tree, or (None, None) outside git.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+def run_benchmarks(database_url, rows, seed, job_names=None):
+    """
+    Runs the selected BENCHMARK_JOBS and returns the report dict.
+    """
+    import sqlalchemy
+    from synthetic_data import create_dataset
+
+    jobs = [job for job in BENCHMARK_JOBS if not job_names or job[0] in job_names]
+    commit, dirty = git_revision()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'database': sqlalchemy.engine.make_url(database_url).get_backend_name(),
+        'rows': rows,
+        'seed': seed,
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix='dbops-benchmark-') as workdir:
+        for name, task, argv in jobs:
+            create_dataset(database_url, rows, seed=seed)
+            if task != 'migrate-properties':
+                setup = run_job_process('migrate-properties', [], database_url, workdir)
+                if setup['exit_code']:
+                    raise RuntimeError(f"Setup migration for '{name}' exited with {setup['exit_code']}.")
+            result = run_job_process(task, argv, database_url, workdir)
+            # A failed job did not process the rows, so it gets no throughput figure
+            failed = result['exit_code'] != 0
+            result = {
+                'job': name,
+                'rows': rows,
+                'failed': failed,
+                'rows_per_sec': round(rows / result['wall_time_s'], 1) if result['wall_time_s'] and not failed else None,
+                **result,
+            }
+            report['results'].append(result)
+            if failed:
+                logging.error(f"{name}: failed with exit code {result['exit_code']} after {result['wall_time_s']}s.")
+            else:
+                logging.info(f"{name}: {result['wall_time_s']}s, {result['rows_per_sec']} rows/s, "
+                             f"{result['statements']} statements, peak RSS {result['peak_rss_kb']} KiB.")
+    return report
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Logs the change in rows/sec per job against an earlier report. Jobs that
+    failed in either report are not compared.
+
+    Returns:
+        list: Names of jobs slower than the baseline by more than tolerance (a fraction).
+    """
+    previous = {result['job']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result['job'])
+        if not before or result['failed'] or before.get('failed') or before.get('exit_code'):
+            continue
+        if not before.get('rows_per_sec') or not result['rows_per_sec']:
+            continue
+        change = result['rows_per_sec'] / before['rows_per_sec'] - 1
+        message = (f"{result['job']}: {before['rows_per_sec']} -> {result['rows_per_sec']} rows/s ({change:+.1%}), "
+                   f"statements {before['statements']} -> {result['statements']}")
+        if change < -tolerance:
+            regressions.append(result['job'])
+            logging.warning(f"Regression: {message}")
+        else:
+            logging.info(message)
+    return regressions
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the benchmark.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the migration and update jobs on synthetic data.")
+    parser.add_argument('--url', default='sqlite:///benchmark.db',
+                        help="SQLAlchemy URL of a scratch database (SQLite file or local MySQL); "
+                             "its benchmark tables are dropped and recreated (default: sqlite:///benchmark.db).")
+    parser.add_argument('--rows', type=int, default=10000, help="Legacy rows to generate (default: 10000).")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for the data (default: 42).")
+    parser.add_argument('--jobs', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        help=f"Comma-separated jobs to run (default: all): {', '.join(job[0] for job in BENCHMARK_JOBS)}.")
+    parser.add_argument('--output', help="Also write the JSON report to this file.")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare rows/sec against.")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Allowed rows/sec drop against --baseline before exiting non-zero (default: 0.10).")
+    parser.add_argument('--job-spec', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.job_spec:
+        spec = json.loads(args.job_spec)
+        result = measure_task(spec['task'], spec['argv'], spec['database_url'])
+        print(json.dumps(result))
+        return
+
+    setup_logging()
+    unknown = [name for name in args.jobs or [] if name not in {job[0] for job in BENCHMARK_JOBS}]
+    if unknown:
+        logging.error(f"Unknown benchmark jobs: {', '.join(unknown)}")
+        sys.exit(1)
+
+    try:
+        report = run_benchmarks(absolute_database_url(args.url), args.rows, args.seed, args.jobs)
+    except Exception as e:
+        logging.error(f"Benchmark failed: {e}")
+        sys.exit(1)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as report_file:
+            report_file.write(output + '\n')
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare_to_baseline(report, json.load(baseline_file), args.tolerance)
+        if regressions:
+            logging.error(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+
+    failed = [result['job'] for result in report['results'] if result['failed']]
+    if failed:
+        logging.error(f"Failed jobs: {', '.join(failed)}")
+    if regressions or failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# bulk_loader.py
+
+import os
+import logging
+import tempfile
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+# Loader backends accepted by the migration scripts' --loader option
+LOADERS = ('insert', 'load-data')
+
+# Server warnings quoted in a failed-load message
+WARNINGS_SHOWN = 5
+
+class LoadDataError(Exception):
+    """
+    LOAD DATA skipped or altered rows. It implies IGNORE, so duplicate keys and
+    conversion errors only produce warnings; raising lets callers roll the batch
+    back and isolate the bad rows, as they do for failed inserts.
+    """
+
+# MySQL's default LOAD DATA escaping: backslash escapes, \N is NULL
+_TSV_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\0': '\\0',
+})
+
+def local_infile_enabled(connection):
+    """
+    Checks whether the server accepts LOAD DATA LOCAL INFILE.
+
+    Returns False as well when the variable cannot be read (e.g. not MySQL).
+    """
+    try:
+        row = connection.exec_driver_sql("SHOW VARIABLES LIKE 'local_infile'").fetchone()
+    except Exception as e:
+        logging.warning(f"Could not read 'local_infile' server variable: {e}")
+        return False
+    return bool(row) and str(row[1]).upper() in ('ON', '1')
+
+def resolve_loader(engine, loader):
+    """
+    Returns the loader to actually use: 'load-data' falls back to 'insert'
+    when the server has local_infile disabled.
+    """
+    if loader != 'load-data':
+        return loader
+    with engine.connect() as connection:
+        if local_infile_enabled(connection):
+            logging.info("Using LOAD DATA LOCAL INFILE loader.")
+            return loader
+    logging.warning("Server has 'local_infile' disabled; falling back to executemany inserts.")
+    return 'insert'
+
+def format_tsv_value(value):
+    """
+    Formats one value for a LOAD DATA TSV field (None becomes \\N).
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+    if isinstance(value, (date, int, float, Decimal)):
+        return str(value)
+    return str(value).translate(_TSV_ESCAPES)
+
+def write_tsv(rows, columns, file_obj):
+    """
+    Writes row dicts as tab-separated lines in the given column order.
+    """
+    for row in rows:
+        file_obj.write('\t'.join(format_tsv_value(row.get(column)) for column in columns))
+        file_obj.write('\n')
+
+def load_data_infile(connection, table, rows):
+    """
+    Bulk-loads row dicts into a table through a temporary TSV file and
+    LOAD DATA LOCAL INFILE. Runs inside the connection's current transaction.
+
+    Args:
+        connection (Connection): A connection from get_engine(..., local_infile=True).
+        table (Table): The target table.
+        rows (list): Dicts sharing the same keys.
+
+    Returns:
+        int: The number of rows loaded, always len(rows).
+
+    Raises:
+        LoadDataError: If fewer rows were loaded than sent, or the server reported
+                       any warnings. The rows already loaded are left to the
+                       caller's rollback.
+    """
+    columns = list(rows[0].keys())
+    fd, path = tempfile.mkstemp(suffix='.tsv', prefix=f'{table.name}_')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as tsv_file:
+            write_tsv(rows, columns, tsv_file)
+
+        quoted_columns = ', '.join(f'`{column}`' for column in columns)
+        statement = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table.name}` "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' "
+            f"({quoted_columns})"
+        )
+        result = connection.exec_driver_sql(statement, (path.replace('\\', '/'),))
+        loaded = result.rowcount
+        warnings = connection.exec_driver_sql("SHOW WARNINGS").fetchall()
+    finally:
+        os.remove(path)
+
+    if warnings or loaded != len(rows):
+        details = '; '.join(f"{level} {code}: {message}" for level, code, message in warnings[:WARNINGS_SHOWN])
+        raise LoadDataError(f"LOAD DATA into '{table.name}' loaded {loaded} of {len(rows)} rows "
+                            f"with {len(warnings)} warnings{': ' + details if details else ''}")
+    logging.info(f"LOAD DATA into '{table.name}' loaded {loaded} rows.")
+    return loaded
+
+def insert_rows(connection, table, rows, loader='insert', insert_stmt=None):
+    """
+    Writes row dicts into a table with the selected loader backend.
+
+    Args:
+        connection (Connection or Session): Where to execute the write.
+        table (Table): The target table.
+        rows (list): Dicts sharing the same keys.
+        loader (str): 'insert' for executemany, 'load-data' for LOAD DATA LOCAL INFILE.
+        insert_stmt (Insert): Optional prebuilt insert() construct to reuse.
+
+    Returns:
+        int: The number of rows written.
+    """
+    if not rows:
+        return 0
+    if loader == 'load-data':
+        if isinstance(connection, Session):
+            # Load through the session's connection so the batch stays in one transaction
+            connection = connection.connection()
+        return load_data_infile(connection, table, rows)
+    connection.execute(insert_stmt if insert_stmt is not None else insert(table), rows)
+    return len(rows)
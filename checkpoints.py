@@ -0,0 +1,64 @@
+# checkpoints.py
+
+import logging
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, String, BigInteger, DateTime, select, update, insert, delete
+
+# Define table name
+CHECKPOINT_TABLE_NAME = 'migration_checkpoints'
+
+metadata = MetaData()
+
+# One row per job: the highest source ID whose batch has been committed
+checkpoints_table = Table(
+    CHECKPOINT_TABLE_NAME, metadata,
+    Column('job_name', String(191), primary_key=True),
+    Column('last_id', BigInteger, nullable=True),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+def ensure_checkpoint_table(engine):
+    """
+    Creates the checkpoint table if it does not exist yet.
+    """
+    checkpoints_table.create(engine, checkfirst=True)
+
+def load_checkpoint(connection, job_name):
+    """
+    Returns the last committed ID recorded for a job, or None if there is none.
+
+    Args:
+        connection (Connection or Session): Where to read the checkpoint from.
+        job_name (str): The job identifier.
+    """
+    stmt = select(checkpoints_table.c.last_id).where(checkpoints_table.c.job_name == job_name)
+    return connection.execute(stmt).scalar()
+
+def save_checkpoint(connection, job_name, last_id):
+    """
+    Records the high-water mark for a job.
+
+    This does not commit: call it inside the transaction that writes the batch,
+    so the checkpoint and the data become visible together or not at all.
+
+    Args:
+        connection (Connection or Session): The connection/session holding the batch transaction.
+        job_name (str): The job identifier.
+        last_id (int): The highest source ID included in the batch.
+    """
+    result = connection.execute(
+        update(checkpoints_table)
+        .where(checkpoints_table.c.job_name == job_name)
+        .values(last_id=last_id, updated_at=datetime.now())
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            insert(checkpoints_table).values(job_name=job_name, last_id=last_id, updated_at=datetime.now())
+        )
+
+def clear_checkpoint(connection, job_name):
+    """
+    Removes a job's checkpoint so the next run starts from the first row.
+    """
+    connection.execute(delete(checkpoints_table).where(checkpoints_table.c.job_name == job_name))
+    logging.info(f"Cleared checkpoint for job '{job_name}'.")
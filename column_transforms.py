@@ -0,0 +1,76 @@
+# column_transforms.py
+#
+# Registry of the per-row column transforms that transform_pipeline.py fuses
+# into a single pass. Each update script registers its logic here with
+# @register_transform; importing a script has no other side effects.
+
+import importlib
+
+# Modules that register transforms, in the order their transforms run.
+# Price scaling must run before currency inference, which reads the price.
+TRANSFORM_MODULES = [
+    'update_bedrooms',
+    'update_price',
+    'update_currency',
+    'update_property_type',
+    'populate_county_name',
+]
+
+# name -> ColumnTransform, filled in by register_transform()
+TRANSFORMS = {}
+
+class ColumnTransform:
+    """
+    A per-row transform registered by one of the update scripts.
+
+    Attributes:
+        name (str): Short name used on the command line (e.g. 'price').
+        columns (list): 'properties_new' columns the transform may change.
+        reads (list): Other 'properties_new' columns it reads.
+        legacy_columns (list): Columns of the legacy 'property' table it reads.
+        func (callable): func(row) -> dict of {column: new value}; the row is a
+            dict holding the current values, including earlier transforms' output.
+        module (str): The module that registered it, which fixes its run order.
+        checkpoint (str): For transforms that must not run twice on a row (e.g. a
+            multiplication), the checkpoint job name shared with the standalone
+            script; the pipeline skips rows at or below its high-water mark and
+            advances it as chunks are committed.
+    """
+
+    def __init__(self, name, columns, reads, legacy_columns, func, module, checkpoint=None):
+        self.name = name
+        self.module = module
+        self.columns = columns
+        self.reads = reads
+        self.legacy_columns = legacy_columns
+        self.func = func
+        self.checkpoint = checkpoint
+
+def register_transform(name, columns, reads=(), legacy_columns=(), checkpoint=None):
+    """
+    Decorator registering a row transform with the pipeline.
+    """
+    def decorator(func):
+        # A script run directly registers as '__main__'; load_transforms() imports it by name instead
+        if func.__module__ in TRANSFORM_MODULES:
+            TRANSFORMS[name] = ColumnTransform(name, list(columns), list(reads), list(legacy_columns),
+                                               func, func.__module__, checkpoint=checkpoint)
+        return func
+    return decorator
+
+def load_transforms(names=None):
+    """
+    Imports the transform modules and returns the selected transforms in run order.
+
+    Args:
+        names (list): Transform names to keep; all of them when None.
+    """
+    for module_name in TRANSFORM_MODULES:
+        importlib.import_module(module_name)
+    ordered = sorted(TRANSFORMS.values(), key=lambda transform: TRANSFORM_MODULES.index(transform.module))
+    if names is None:
+        return ordered
+    unknown = set(names) - set(TRANSFORMS)
+    if unknown:
+        raise ValueError(f"Unknown transforms: {', '.join(sorted(unknown))}. Available: {', '.join(TRANSFORMS)}")
+    return [transform for transform in ordered if transform.name in names]
@@ -1,23 +1,48 @@
 # config.py
+#
+# Connection settings for every script. db.get_engine(name) combines
+# DB_DEFAULTS with the entry for `name` in DATABASES, plus POOL and SESSION.
 
-# Old Database Configuration
-OLD_DB = {
-    'type': 'mysql',
-    'driver': 'pymysql',
-    'username': 'old_user',
-    'password': 'old_password',
+# Settings shared by every logical database
+DB_DEFAULTS = {
+    'driver': 'pymysql',       # 'pymysql', 'mysqlclient' or 'mysql-connector'
+    'username': 'root',        # Default XAMPP MySQL username
+    'password': '',            # Default XAMPP MySQL password is empty
     'host': 'localhost',
-    'port': '3306',
-    'database': 'old_db'
+    'port': '3306',            # Default MySQL port
 }
 
-# New Database Configuration
-NEW_DB = {
-    'type': 'mysql',
-    'driver': 'pymysql',
-    'username': 'new_user',
-    'password': 'new_password',
-    'host': 'localhost',
-    'port': '3306',
-    'database': 'new_db'
+# Logical databases used by the scripts. An entry may override any key of
+# DB_DEFAULTS (e.g. 'driver': 'mysql-connector', which needs
+# `pip install mysql-connector-python`), set its own 'pool'/'session' dicts, or
+# give a full SQLAlchemy 'url' that replaces the MySQL connection settings altogether.
+DATABASES = {
+    'archstone_test': {'database': 'archstone_test'},
+    'archstone_test_db': {'database': 'archstone_test_db'},
+    'archstone_clone': {'database': 'archstone_clone'},
+    'archstone_db': {'database': 'archstone_db'},
+}
+
+# Connection pool settings passed to create_engine()
+POOL = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_pre_ping': True,     # Test connections on checkout so long jobs survive server restarts
+    'pool_recycle': 3600,      # Recycle connections before MySQL's wait_timeout closes them
+}
+
+# Session settings applied to every new connection
+SESSION = {
+    'autocommit': False,       # True runs every statement in its own transaction
+    'sql_mode': None,          # e.g. 'STRICT_TRANS_TABLES,NO_ENGINE_SUBSTITUTION'; None keeps the server default
+}
+
+# Directory for the on-disk reflected-schema cache (see schema.py); None disables it
+SCHEMA_CACHE_DIR = '.schema_cache'
+
+# Opt-in SQL instrumentation (see sql_metrics.py): 'format' is None (off),
+# 'summary' or 'jsonl'; 'output' is a file to append the report to (None: stderr)
+SQL_METRICS = {
+    'format': None,
+    'output': None,
 }
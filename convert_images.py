@@ -0,0 +1,285 @@
+# convert_images.py
+#
+# Converts the .webp images referenced by property_images.image_path and
+# locations.image to .avif in a process pool, next to the originals, and points
+# the database at each converted file once it has been written and verified.
+# Encoding needs Pillow with AVIF support: Pillow 11.2+ built with libavif, or
+# the pillow-avif-plugin package on older versions. Re-running the job skips
+# images whose .avif is already up to date, so an interrupted run just resumes.
+
+import os
+import sys
+import argparse
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy.exc import NoSuchTableError
+
+from db import get_engine
+from schema import reflect_tables
+from fs_index import FileIndex
+from file_transfer import run_bounded
+from extension_migration import fetch_candidate_paths, apply_path_changes
+
+# Table -> path column holding the images to convert
+CONVERSION_TARGETS = {
+    'property_images': 'image_path',
+    'locations': 'image',
+}
+
+SOURCE_EXT = '.webp'
+TARGET_EXT = '.avif'
+
+# Log progress every this many images
+PROGRESS_EVERY = 500
+
+def setup_logging():
+    """
+    Configures logging to log messages to a file and the console.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.FileHandler("convert_images.log"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+def load_avif_plugin():
+    """
+    Makes AVIF available to Pillow in this process.
+
+    Returns:
+        bool: True if Pillow can write AVIF files.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+    try:
+        import pillow_avif  # noqa: F401 -- registers the plugin on Pillow versions without native AVIF
+    except ImportError:
+        pass
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+def target_path(path):
+    """
+    Returns the .avif path for a stored .webp path.
+    """
+    return path[:-len(SOURCE_EXT)] + TARGET_EXT
+
+def convert_image(job):
+    """
+    Encodes one image as AVIF. Runs in a worker process.
+
+    The output is written under a temporary name, decoded again and checked
+    against the source dimensions, and only then renamed into place, so an
+    .avif file under its final name is always complete.
+
+    Args:
+        job (tuple): (stored path, source file, target file, quality, speed).
+
+    Returns:
+        int: The size of the written file in bytes.
+    """
+    from PIL import Image
+
+    _, source_file, target_file, quality, speed = job
+    tmp_file = os.path.join(os.path.dirname(target_file), f".{os.path.basename(target_file)}.{os.getpid()}.tmp")
+    try:
+        with Image.open(source_file) as image:
+            image.load()
+            size = image.size
+            if image.mode not in ('RGB', 'RGBA'):
+                has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            image.save(tmp_file, format='AVIF', quality=quality, speed=speed)
+        with Image.open(tmp_file) as converted:
+            converted.load()
+            if converted.format != 'AVIF' or converted.size != size:
+                raise ValueError(f"verification failed: wrote {converted.format} {converted.size}, expected AVIF {size}")
+        os.replace(tmp_file, target_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return os.path.getsize(target_file)
+
+def plan_conversions(paths, base_dir):
+    """
+    Sorts stored .webp paths by what needs to happen to them, using one
+    directory index per top-level folder (e.g. uploads, locationimages).
+
+    Returns:
+        tuple: Three sorted lists of stored paths: already converted (the .avif
+               is at least as new as the .webp), to convert, and not found locally.
+    """
+    roots = {path.split('/', 1)[0] for path in paths if '/' in path}
+    indexes = {}
+    for root in roots:
+        if os.path.isdir(os.path.join(base_dir, root)):
+            indexes[root] = FileIndex(os.path.join(base_dir, root), with_stat=True)
+
+    converted, to_convert, missing = [], [], []
+    for path in sorted(paths):
+        root, _, relative = path.partition('/')
+        index = indexes.get(root)
+        source_info = index.info(relative) if index is not None and relative else None
+        if source_info is None:
+            missing.append(path)
+            continue
+        target_info = index.info(target_path(relative))
+        if target_info is not None and target_info.mtime_ns >= source_info.mtime_ns:
+            converted.append(path)
+        else:
+            to_convert.append(path)
+    return converted, to_convert, missing
+
+def update_paths(engine, tables, candidates, paths):
+    """
+    Points every table that references one of the paths at its .avif file,
+    with one UPDATE ... JOIN per table in a single transaction.
+
+    Returns:
+        int: The number of rows changed.
+    """
+    updated = 0
+    with engine.begin() as connection:
+        for table in tables:
+            pairs = [{'old_path': path, 'new_path': target_path(path)}
+                     for path in paths if path in candidates[table.name]]
+            updated += apply_path_changes(connection, table, CONVERSION_TARGETS[table.name], pairs)
+    return updated
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the conversion.
+    """
+    parser = argparse.ArgumentParser(description="Convert referenced .webp images to .avif and update their database paths.")
+    parser.add_argument('--database', default='archstone_test_db',
+                        help="Logical database from config.py (default: archstone_test_db).")
+    parser.add_argument('--tables', default=','.join(CONVERSION_TARGETS),
+                        type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        help=f"Comma-separated tables to convert images for (default: {','.join(CONVERSION_TARGETS)}).")
+    parser.add_argument('--base-dir', default='.',
+                        help="Directory the stored image paths are relative to (default: current directory).")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of encoder processes (default: number of CPU cores).")
+    parser.add_argument('--quality', type=int, default=60,
+                        help="AVIF quality, 0-100; higher is larger and closer to the original (default: 60).")
+    parser.add_argument('--speed', type=int, default=6,
+                        help="AVIF encoder speed, 0 (slowest, smallest) to 10 (fastest) (default: 6).")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Verified conversions per bulk database update (default: 500).")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Report what would be converted and updated without doing it.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Setup logging
+    setup_logging()
+
+    unknown = [name for name in args.tables if name not in CONVERSION_TARGETS]
+    if unknown:
+        logging.error(f"Unknown tables: {', '.join(unknown)}. Choose from {', '.join(CONVERSION_TARGETS)}.")
+        sys.exit(1)
+    if not args.dry_run and not load_avif_plugin():
+        logging.error("Pillow cannot write AVIF here. Install Pillow 11.2 or newer with AVIF support, "
+                      "or 'pip install pillow-avif-plugin'.")
+        sys.exit(1)
+
+    # Get the shared SQLAlchemy engine
+    try:
+        engine = get_engine(args.database)
+        logging.info("Database engine created successfully.")
+    except Exception as e:
+        logging.error(f"Error creating engine: {e}")
+        sys.exit(1)
+
+    # Reflect only the tables used here
+    try:
+        tables = reflect_tables(engine, args.tables)
+        logging.info("Database schema reflected successfully.")
+    except NoSuchTableError as e:
+        logging.error(f"Missing tables in the database: {e}")
+        sys.exit(1)
+    except Exception as e:
+        logging.error(f"Error reflecting metadata: {e}")
+        sys.exit(1)
+
+    # One query per table for every .webp path it references
+    try:
+        candidates = {}
+        with engine.connect() as connection:
+            for table in tables:
+                candidates[table.name] = fetch_candidate_paths(connection, table.c[CONVERSION_TARGETS[table.name]], '', SOURCE_EXT)
+                logging.info(f"Fetched {len(candidates[table.name])} distinct '{SOURCE_EXT}' paths from '{table.name}'.")
+    except Exception as e:
+        logging.error(f"Error fetching image paths: {e}")
+        sys.exit(1)
+
+    paths = set().union(*candidates.values())
+    converted, to_convert, missing = plan_conversions(paths, args.base_dir)
+    logging.info(f"{len(to_convert)} images to convert, {len(converted)} already converted, "
+                 f"{len(missing)} not found under '{args.base_dir}'.")
+
+    if args.dry_run:
+        for path in to_convert[:10]:
+            logging.info(f"Would convert: {path} -> {target_path(path)}")
+        logging.info("Dry run: nothing converted or updated.")
+        return
+
+    counts = Counter()
+
+    # Files converted by an earlier, interrupted run only need their database paths
+    try:
+        for i in range(0, len(converted), args.batch_size):
+            counts['rows_updated'] += update_paths(engine, tables, candidates, converted[i:i + args.batch_size])
+    except Exception as e:
+        logging.error(f"Error updating image paths: {e}")
+        sys.exit(1)
+
+    verified = []
+
+    def flush():
+        counts['rows_updated'] += update_paths(engine, tables, candidates, verified)
+        verified.clear()
+
+    def record(job, result, error):
+        path = job[0]
+        if error is not None:
+            counts['failed'] += 1
+            logging.error(f"Error converting '{path}': {error}")
+        else:
+            counts['converted'] += 1
+            counts['bytes_written'] += result
+            verified.append(path)
+            if len(verified) >= args.batch_size:
+                flush()
+        done = counts['converted'] + counts['failed']
+        if done % PROGRESS_EVERY == 0:
+            logging.info(f"Processed {done}/{len(to_convert)} images: {dict(counts)}")
+
+    jobs = ((path, os.path.join(args.base_dir, path), os.path.join(args.base_dir, target_path(path)),
+             args.quality, args.speed) for path in to_convert)
+    workers = max(1, args.workers)
+    logging.info(f"Converting with {workers} processes (quality {args.quality}, speed {args.speed}).")
+    try:
+        run_bounded(convert_image, jobs, workers, on_result=record,
+                    executor_class=ProcessPoolExecutor, initializer=load_avif_plugin)
+        if verified:
+            flush()
+    except Exception as e:
+        logging.error(f"Error updating image paths: {e}")
+        sys.exit(1)
+
+    logging.info(f"Conversion finished: {dict(counts)}")
+    if counts['failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 # create_properties_new.py
 
 import sqlalchemy
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DECIMAL, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DECIMAL, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
+from db import get_engine
+
 # Define the base class
 Base = declarative_base()
 
@@ -29,20 +31,13 @@ class PropertiesNew(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-# Database connection configuration
-DB_USERNAME = 'root'        # Default XAMPP MySQL username
-DB_PASSWORD = ''            # Default XAMPP MySQL password is empty
-DB_HOST = 'localhost'
-DB_PORT = '3306'            # Default MySQL port
-DB_NAME = 'archstone_test'     # Replace with your actual database name
-
-# Create the database URL
-DATABASE_URL = f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Logical database from config.py
+DB_NAME = 'archstone_test'
 
 def main():
-    # Create the SQLAlchemy engine
+    # Get the SQLAlchemy engine
     try:
-        engine = create_engine(DATABASE_URL, echo=True)
+        engine = get_engine(DB_NAME, echo=True)
     except Exception as e:
         print(f"Error creating engine: {e}")
         return
@@ -0,0 +1,131 @@
+# db.py
+
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL
+
+import config
+
+# SQLAlchemy dialect+driver names for the drivers config.py accepts
+DRIVERS = {
+    'pymysql': 'mysql+pymysql',
+    'mysqlclient': 'mysql+mysqldb',
+    'mysql-connector': 'mysql+mysqlconnector',
+}
+
+# Connect argument each driver needs to allow LOAD DATA LOCAL INFILE
+LOCAL_INFILE_ARGS = {
+    'pymysql': 'local_infile',
+    'mysqlclient': 'local_infile',
+    'mysql-connector': 'allow_local_infile',
+}
+
+# (name, overrides) -> Engine, for the current process only
+_engines = {}
+_engines_pid = os.getpid()
+
+def database_settings(name):
+    """
+    Returns the merged connection settings for a logical database from config.py.
+
+    Raises:
+        KeyError: If the database is not listed in config.DATABASES.
+    """
+    if name not in config.DATABASES:
+        raise KeyError(f"Unknown database '{name}'. Configured: {', '.join(config.DATABASES)}")
+    settings = dict(config.DB_DEFAULTS)
+    settings.update(config.DATABASES[name])
+    settings['pool'] = {**config.POOL, **config.DATABASES[name].get('pool', {})}
+    settings['session'] = {**config.SESSION, **config.DATABASES[name].get('session', {})}
+    return settings
+
+def database_url(name, driver=None):
+    """
+    Builds the SQLAlchemy URL for a logical database.
+    """
+    settings = database_settings(name)
+    if settings.get('url'):
+        return settings['url']
+    driver = driver or settings['driver']
+    if driver not in DRIVERS:
+        raise ValueError(f"Unsupported driver '{driver}'. Choose one of: {', '.join(DRIVERS)}")
+    return URL.create(
+        DRIVERS[driver],
+        username=settings['username'],
+        password=settings['password'] or None,
+        host=settings['host'],
+        port=int(settings['port']),
+        database=settings['database'],
+    )
+
+def _build_engine(name, driver=None, local_infile=False, echo=False, **overrides):
+    settings = database_settings(name)
+    driver = driver or settings['driver']
+    url = database_url(name, driver=driver)
+    session_settings = {**settings['session'], **{key: overrides.pop(key) for key in list(overrides) if key in settings['session']}}
+
+    options = {'echo': echo}
+    if not str(url).startswith('sqlite'):
+        options.update(settings['pool'])
+    options.update(overrides)
+
+    connect_args = dict(options.pop('connect_args', {}))
+    if local_infile:
+        connect_args[LOCAL_INFILE_ARGS[driver]] = True
+    if connect_args:
+        options['connect_args'] = connect_args
+    if session_settings['autocommit']:
+        options['isolation_level'] = 'AUTOCOMMIT'
+
+    engine = create_engine(url, **options)
+
+    sql_mode = session_settings['sql_mode']
+    if sql_mode is not None:
+        @event.listens_for(engine, 'connect')
+        def set_sql_mode(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET SESSION sql_mode = %s", (sql_mode,))
+            cursor.close()
+
+    if config.SQL_METRICS.get('format'):
+        import sql_metrics
+        sql_metrics.instrument(engine, config.SQL_METRICS['format'], config.SQL_METRICS.get('output'))
+
+    return engine
+
+def get_engine(name='archstone_test', **overrides):
+    """
+    Returns the shared, pooled engine for a logical database, creating it on first use.
+
+    Engines are cached per database and set of overrides, so every caller in a
+    process shares one connection pool. A process started by fork gets fresh
+    engines instead of the parent's connections.
+
+    Args:
+        name (str): A key of config.DATABASES.
+        **overrides: Per-call settings: driver, local_infile, echo, autocommit,
+            sql_mode, connect_args, or any create_engine() pool argument.
+
+    Returns:
+        Engine: The cached engine.
+    """
+    global _engines_pid
+    if os.getpid() != _engines_pid:
+        # Never reuse connections inherited from the parent process
+        for engine in _engines.values():
+            engine.dispose(close=False)
+        _engines.clear()
+        _engines_pid = os.getpid()
+
+    key = (name, tuple(sorted((key, repr(value)) for key, value in overrides.items())))
+    if key not in _engines:
+        _engines[key] = _build_engine(name, **overrides)
+    return _engines[key]
+
+def dispose_engines():
+    """
+    Closes every cached engine's pooled connections.
+    """
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
@@ -0,0 +1,107 @@
+# dbops/__init__.py
+#
+# Registry of the repository's jobs, run as `python -m dbops <task> [options]`
+# or from Python with run_task(). Tasks are stored as 'module:function' strings
+# and only imported when they run, so listing tasks never imports SQLAlchemy,
+# pandas, requests or bs4, and a long-lived process only pays for the jobs it calls.
+
+import os
+import sys
+import importlib
+
+# Task name -> ('module:function', one-line description)
+TASKS = {
+    # Migration
+    'create-properties-new': ('create_properties_new:main', "Create the 'properties_new' table."),
+    'migrate-properties': ('migrate_properties:main', "Migrate legacy 'property' rows into 'properties_new' and 'property_images'."),
+    'migrate-property-images': ('migrate_property_images:main', "Re-run only the image step of the migration."),
+
+    # Column transforms on 'properties_new'
+    'transform-pipeline': ('transform_pipeline:main', "Apply all column transforms in one pass."),
+    'update-bedrooms': ('update_bedrooms:main', "Fill 'bedrooms' from the legacy rooms column."),
+    'update-price': ('update_price:main', "Rescale prices entered in millions."),
+    'update-currency': ('update_currency:main', "Set 'currency' from the price range."),
+    'update-property-type': ('update_property_type:main', "Normalize 'property_type' to buy/rent."),
+    'populate-county-name': ('populate_county_name:main', "Fill 'county_name' from the location."),
+    'update-location-ids': ('update_location_ids:main', "Assign properties.location_id from 'locations'."),
+
+    # Property categories
+    'property-categories-seeder': ('property_categories_seeder:main', "Export property/category ID mappings to CSV."),
+    'property-category-seeder': ('property_category_seeder:main', "Seed 'property_categories' and link properties to it."),
+    'property-category-cleanup': ('property_category_cleanup:main', "Correct misspelled property categories."),
+    'property-category-migration': ('property_category_migration:main', "Rename 'stand alone' categories to 'stand-alone'."),
+    'update-property-categories': ('update_property_categories:main', "Correct property categories without reporting."),
+
+    # Exports
+    'archive': ('archive:main', "Export unarchived property IDs to CSV."),
+    'export-property-categories': ('export_property_categories:main', "Export 'property_categories' to CSV."),
+    'export-unique-locations': ('export_unique_locations:main', "Export distinct property locations to CSV."),
+
+    # Images
+    'organize-property-images': ('organize_property_images:main', "Link or copy property images into per-property upload folders."),
+    'change-image-names': ('change_image_names:main', "Rename .webp image paths to .avif for one property."),
+    'convert-images': ('convert_images:main', "Convert referenced .webp images to .avif in parallel and update their paths."),
+    'migrate-image-extensions': ('extension_migration:main', "Rewrite image paths to a new extension where converted files exist."),
+    'check-converted-images': ('check_converted_images:main', "Point image paths at .avif files converted in place in uploads."),
+    'image-mapping': ('image_mapping:main', "Point image paths at .avif files converted into Converted."),
+    'update-image-paths': ('update_image_paths:main', "Point image paths at .avif files converted into Converted."),
+    'locationimagesops': ('locationimagesops:main', "Map old location .webp images to their .avif versions."),
+    'location-imageops': ('location_imageops:main', "Replace old location .webp images using the mapping CSV."),
+    'locationops': ('locationops:main', "Move location image paths into per-location folders."),
+
+    # Benchmarks
+    'synthetic-data': ('synthetic_data:main', "Generate a synthetic legacy 'property' table."),
+    'benchmark': ('benchmark:main', "Benchmark the jobs on synthetic data and report JSON."),
+
+    # Website
+    'crawl': ('crawl:main', "Crawl the website and save internal URLs."),
+    'update-sitemap': ('update_sitemap:main', "Add crawled URLs to the sitemap."),
+    'submit-indexnow': ('submit_indexnow:main', "Submit sitemap URLs to IndexNow."),
+    'scrap-descriptions': ('scrap_descriptions:main', "Collect keywords from a real estate website."),
+    'login': ('login:main', "Find templates that link to the 'login' route."),
+}
+
+# The job modules live in the repository root, next to this package
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_repo_root_to_path():
+    """
+    Makes the job modules (and config.py) importable from any working directory.
+    """
+    if _REPO_ROOT not in sys.path:
+        sys.path.insert(0, _REPO_ROOT)
+
+def load_task(name):
+    """
+    Imports a task's module and returns its entry-point function.
+
+    Raises:
+        KeyError: If the task is not registered.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown task '{name}'. Run 'python -m dbops --list' to see the available tasks.")
+    add_repo_root_to_path()
+    module_name, function_name = TASKS[name][0].split(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+def run_task(name, argv=None):
+    """
+    Runs a task in the current process.
+
+    Tasks report fatal errors by calling sys.exit(), so callers that must keep
+    running should catch SystemExit.
+
+    Args:
+        name (str): A key of TASKS.
+        argv (list): Command-line options for tasks that accept them.
+
+    Returns:
+        The task function's return value.
+    """
+    func = load_task(name)
+    if func.__code__.co_argcount:
+        return func(list(argv or []))
+    if argv:
+        raise ValueError(f"Task '{name}' does not take any options.")
+    return func()
@@ -0,0 +1,59 @@
+# dbops/__main__.py
+
+import sys
+import argparse
+
+from dbops import TASKS, add_repo_root_to_path, run_task
+
+def format_task_list():
+    """
+    Returns the registered tasks and their descriptions, one per line.
+    """
+    width = max(len(name) for name in TASKS)
+    return '\n'.join(f"  {name.ljust(width)}  {description}" for name, (_, description) in TASKS.items())
+
+def parse_args(argv=None):
+    """
+    Parses the task name; everything after it is passed to the task unchanged.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m dbops',
+        description="Run one of the database and image maintenance jobs.",
+        epilog=f"tasks:\n{format_task_list()}\n\nRun 'python -m dbops <task> --help' for a task's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--list', action='store_true', help="List the available tasks and exit.")
+    parser.add_argument('--sql-metrics', choices=('summary', 'jsonl'),
+                        help="Instrument the task's database engines and report per-statement SQL metrics at exit.")
+    parser.add_argument('--sql-metrics-output',
+                        help="Append the SQL metrics report to this file instead of stderr.")
+    parser.add_argument('task', nargs='?', help="The task to run.")
+    parser.add_argument('task_args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if not args.list and not args.task:
+        parser.error("a task name is required (see --list)")
+    if args.task and args.task not in TASKS:
+        parser.error(f"unknown task '{args.task}' (see --list)")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.list:
+        print(format_task_list())
+        return 0
+    if args.sql_metrics:
+        add_repo_root_to_path()
+        import config
+        config.SQL_METRICS = {'format': args.sql_metrics, 'output': args.sql_metrics_output}
+
+    # Tasks parse their own options; make their usage lines name the task
+    sys.argv = [f"python -m dbops {args.task}", *args.task_args]
+    try:
+        run_task(args.task, args.task_args)
+    except ValueError as e:
+        print(f"python -m dbops: error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
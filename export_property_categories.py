@@ -1,32 +1,39 @@
-from sqlalchemy import create_engine, MetaData, Table, select
-import pandas as pd
-
-# Database connection parameters
-DATABASE_URI = "mysql+pymysql://root:@localhost/archstone_clone"
-
-# Connect to the database
-engine = create_engine(DATABASE_URI)
-connection = engine.connect()
-metadata = MetaData()
-
-# Load the property_categories table
-property_categories_table = Table("property_categories", metadata, autoload_with=engine)
-
-try:
-    # Query all data from the property_categories table
-    query = select(property_categories_table)
-    result = connection.execute(query)
-
-    # Fetch data into a DataFrame
-    df_property_categories = pd.DataFrame(result.fetchall(), columns=result.keys())
-
-    # Output CSV file
-    output_csv_path = "property_categories.csv"
-    df_property_categories.to_csv(output_csv_path, index=False)
-    print(f"Data exported successfully to {output_csv_path}")
-
-except Exception as e:
-    print(f"An error occurred: {e}")
-finally:
-    # Close the connection
-    connection.close()
+from sqlalchemy import select
+
+from db import get_engine
+from schema import get_table
+
+# Logical database from config.py
+DATABASE_NAME = 'archstone_clone'
+
+def main():
+    import pandas as pd
+
+    # Connect to the database
+    engine = get_engine(DATABASE_NAME)
+    connection = engine.connect()
+
+    # Load the property_categories table
+    property_categories_table = get_table(engine, "property_categories")
+
+    try:
+        # Query all data from the property_categories table
+        query = select(property_categories_table)
+        result = connection.execute(query)
+
+        # Fetch data into a DataFrame
+        df_property_categories = pd.DataFrame(result.fetchall(), columns=result.keys())
+
+        # Output CSV file
+        output_csv_path = "property_categories.csv"
+        df_property_categories.to_csv(output_csv_path, index=False)
+        print(f"Data exported successfully to {output_csv_path}")
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    finally:
+        # Close the connection
+        connection.close()
+
+if __name__ == "__main__":
+    main()
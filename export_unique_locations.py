@@ -4,9 +4,11 @@ import os
 import sys
 import logging
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
+from db import get_engine
+
 def setup_logging():
     """
     Configures logging to output messages to both console and a log file.
@@ -20,13 +22,12 @@ def setup_logging():
         ]
     )
 
-def create_db_engine(username, password, host, port, database):
+def create_db_engine(database):
     """
-    Creates and returns a SQLAlchemy engine.
+    Returns the shared SQLAlchemy engine for a logical database from config.py.
     """
     try:
-        db_url = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-        engine = create_engine(db_url, echo=False)
+        engine = get_engine(database)
         logging.info("Database engine created successfully.")
         return engine
     except Exception as e:
@@ -78,12 +79,8 @@ def export_to_csv(df, output_file):
 def main():
     setup_logging()
     
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'  # Replace with your actual database name
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
     
     # Table and column details
     TABLE_NAME = 'properties_new'
@@ -93,7 +90,7 @@ def main():
     OUTPUT_CSV = 'unique_locations.csv'
     
     # Create database engine
-    engine = create_db_engine(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
+    engine = create_db_engine(DB_NAME)
     
     # Fetch location data
     location_df = fetch_location_data(engine, TABLE_NAME, COLUMN_NAME)
@@ -0,0 +1,215 @@
+# extension_migration.py
+#
+# Rewrites stored image paths from one extension to another (by default
+# .webp -> .avif) for every image whose converted file exists on disk. The
+# candidate paths are read with one query, matched against a one-pass index of
+# the converted files, and applied with a single UPDATE ... JOIN through a
+# temporary staging table. check_converted_images.py, image_mapping.py and
+# update_image_paths.py are presets of this script.
+
+import os
+import sys
+import csv
+import argparse
+import logging
+from datetime import datetime
+from sqlalchemy import Column, String, select, update
+from sqlalchemy.exc import NoSuchTableError
+
+from db import get_engine
+from schema import get_table
+from fs_index import FileIndex
+from staging import staging_table, load_staging_rows
+
+# Longest path the staging table holds; matches property_images.image_path
+STAGING_PATH_LENGTH = 512
+
+# Pairs shown in the log of a dry run
+SAMPLE_SIZE = 10
+
+def setup_logging():
+    """
+    Configures logging to log messages to a file and the console.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.FileHandler("extension_migration.log"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def fetch_candidate_paths(connection, column, path_prefix, source_ext):
+    """
+    Returns the distinct stored paths under path_prefix ending in source_ext, in one query.
+
+    Returns:
+        set: The matching column values.
+    """
+    pattern = f"{_like_escape(path_prefix.rstrip('/'))}/%{_like_escape(source_ext)}" if path_prefix \
+        else f"%{_like_escape(source_ext)}"
+    stmt = select(column).where(column.like(pattern, escape='\\')).distinct()
+    return set(connection.execute(stmt).scalars())
+
+def plan_path_changes(candidates, target_index, path_prefix, source_ext, target_ext):
+    """
+    Matches stored paths against the converted files in target_index.
+
+    A stored path '<path_prefix>/<rel>.<source_ext>' is rewritten to
+    '<path_prefix>/<rel>.<target_ext>' when '<rel>.<target_ext>' exists under
+    the index root.
+
+    Args:
+        candidates (set): Stored paths from fetch_candidate_paths().
+        target_index (FileIndex): Index of the directory holding the converted files.
+        path_prefix (str): The stored-path prefix corresponding to the index root ('' for none).
+        source_ext (str): The extension being replaced, e.g. '.webp'.
+        target_ext (str): The new extension, e.g. '.avif'.
+
+    Returns:
+        tuple: (list of {'old_path', 'new_path'} dicts, sorted list of paths with no converted file).
+    """
+    prefix = f"{path_prefix.rstrip('/')}/" if path_prefix else ''
+    pairs = []
+    unconverted = []
+    for old_path in candidates:
+        if not old_path.startswith(prefix) or not old_path.endswith(source_ext):
+            continue
+        relative_target = old_path[len(prefix):len(old_path) - len(source_ext)] + target_ext
+        if target_index.is_file(relative_target):
+            pairs.append({'old_path': old_path, 'new_path': prefix + relative_target})
+        else:
+            unconverted.append(old_path)
+    pairs.sort(key=lambda pair: pair['old_path'])
+    return pairs, sorted(unconverted)
+
+def apply_path_changes(connection, table, column_name, pairs):
+    """
+    Applies (old_path, new_path) pairs with a single UPDATE ... JOIN on a staging table.
+
+    The 'updated_at' column is set too when the table has one. Run it inside a
+    transaction (engine.begin()); the staging table lives on this connection only.
+
+    Args:
+        connection (Connection): The connection (and transaction) to use.
+        table (Table): The table holding the paths.
+        column_name (str): The path column.
+        pairs (list): {'old_path': ..., 'new_path': ...} dicts.
+
+    Returns:
+        int: The number of rows changed.
+    """
+    if not pairs:
+        return 0
+    column = table.c[column_name]
+    with staging_table(
+        connection, 'tmp_path_changes',
+        Column('old_path', String(STAGING_PATH_LENGTH), primary_key=True),
+        Column('new_path', String(STAGING_PATH_LENGTH), nullable=False),
+    ) as staging:
+        load_staging_rows(connection, staging, pairs)
+        values = {column_name: staging.c.new_path}
+        if 'updated_at' in table.c:
+            values['updated_at'] = datetime.now()
+        stmt = update(table).where(column == staging.c.old_path).values(values)
+        return connection.execute(stmt).rowcount
+
+def write_report(path, pairs, unconverted):
+    """
+    Writes every candidate path and what happens to it to a CSV file.
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as report_file:
+        writer = csv.writer(report_file)
+        writer.writerow(['old_path', 'new_path', 'status'])
+        for pair in pairs:
+            writer.writerow([pair['old_path'], pair['new_path'], 'converted'])
+        for old_path in unconverted:
+            writer.writerow([old_path, '', 'no converted file'])
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the extension migration.
+    """
+    parser = argparse.ArgumentParser(description="Rewrite stored image paths to a new extension where the converted file exists.")
+    parser.add_argument('--database', default='archstone_test_db',
+                        help="Logical database from config.py (default: archstone_test_db).")
+    parser.add_argument('--table', default='property_images', help="Table holding the paths (default: property_images).")
+    parser.add_argument('--column', default='image_path', help="Path column (default: image_path).")
+    parser.add_argument('--source-ext', default='.webp', help="Extension being replaced (default: .webp).")
+    parser.add_argument('--target-ext', default='.avif', help="New extension (default: .avif).")
+    parser.add_argument('--target-root', default='uploads',
+                        help="Directory holding the converted files, laid out like the stored paths (default: uploads).")
+    parser.add_argument('--path-prefix', default='uploads',
+                        help="Stored-path prefix that corresponds to --target-root; '' for none (default: uploads).")
+    parser.add_argument('--dry-run', action='store_true', help="Report the changes without updating the database.")
+    parser.add_argument('--report', help="Write every candidate path and its outcome to this CSV file.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Setup logging
+    setup_logging()
+
+    # Get the shared SQLAlchemy engine
+    try:
+        engine = get_engine(args.database)
+        logging.info("Database engine created successfully.")
+    except Exception as e:
+        logging.error(f"Error creating engine: {e}")
+        sys.exit(1)
+
+    # Reflect only the table used here
+    try:
+        table = get_table(engine, args.table)
+        logging.info(f"Table '{args.table}' reflected successfully.")
+    except NoSuchTableError:
+        logging.error(f"Table '{args.table}' does not exist in the database.")
+        sys.exit(1)
+    except Exception as e:
+        logging.error(f"Error reflecting metadata: {e}")
+        sys.exit(1)
+    if args.column not in table.c:
+        logging.error(f"Column '{args.column}' does not exist in '{args.table}'.")
+        sys.exit(1)
+
+    if not os.path.isdir(args.target_root):
+        logging.error(f"Directory '{args.target_root}' does not exist.")
+        sys.exit(1)
+    target_index = FileIndex(args.target_root)
+    logging.info(f"Indexed {len(target_index)} files in {target_index.directories_scanned} directories under '{args.target_root}'.")
+
+    try:
+        with engine.connect() as connection:
+            candidates = fetch_candidate_paths(connection, table.c[args.column], args.path_prefix, args.source_ext)
+        logging.info(f"Fetched {len(candidates)} distinct '{args.source_ext}' paths from '{args.table}.{args.column}'.")
+    except Exception as e:
+        logging.error(f"Error fetching paths from '{args.table}': {e}")
+        sys.exit(1)
+
+    pairs, unconverted = plan_path_changes(candidates, target_index, args.path_prefix, args.source_ext, args.target_ext)
+    logging.info(f"{len(pairs)} paths have a converted '{args.target_ext}' file; {len(unconverted)} do not.")
+    if args.report:
+        write_report(args.report, pairs, unconverted)
+        logging.info(f"Report written to '{args.report}'.")
+
+    if args.dry_run:
+        for pair in pairs[:SAMPLE_SIZE]:
+            logging.info(f"Would update: {pair['old_path']} -> {pair['new_path']}")
+        logging.info(f"Dry run: {len(pairs)} paths would be updated.")
+        return
+
+    try:
+        with engine.begin() as connection:
+            updated = apply_path_changes(connection, table, args.column, pairs)
+        logging.info(f"Updated {updated} rows in '{args.table}' from '{args.source_ext}' to '{args.target_ext}'.")
+    except Exception as e:
+        logging.error(f"Error updating paths in '{args.table}': {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# file_transfer.py
+
+import os
+import errno
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+# How a file is placed at its destination:
+#   hardlink - a second directory entry for the same inode; no data is copied
+#   reflink  - os.copy_file_range(), which shares extents on filesystems that
+#              support it (Btrfs, XFS, ...) and otherwise copies inside the kernel
+#   symlink  - a symbolic link to the absolute source path
+#   copy     - a full copy with shutil.copy2()
+TRANSFER_STRATEGIES = ('hardlink', 'reflink', 'symlink', 'copy')
+
+# Errors meaning "this strategy cannot be used for this file", after which the
+# file is copied instead: cross-device links, filesystems without hard links
+# or copy_file_range, and link count limits.
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL, errno.EMLINK}
+
+# Upper bound on the bytes asked of one copy_file_range() call
+_COPY_RANGE_CHUNK = 1 << 30
+
+def same_filesystem(source_dir, dest_dir):
+    """
+    Returns True if two directories are on the same filesystem (device).
+
+    The destination may not exist yet; its nearest existing parent is checked.
+    """
+    dest_dir = os.path.abspath(dest_dir)
+    while not os.path.exists(dest_dir):
+        parent = os.path.dirname(dest_dir)
+        if parent == dest_dir:
+            break
+        dest_dir = parent
+    try:
+        return os.stat(source_dir).st_dev == os.stat(dest_dir).st_dev
+    except OSError:
+        return False
+
+def default_strategy(source_dir, dest_dir):
+    """
+    Returns 'hardlink' when source and destination share a filesystem, otherwise 'copy'.
+    """
+    return 'hardlink' if same_filesystem(source_dir, dest_dir) else 'copy'
+
+def _reflink(source_path, tmp_path):
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, "os.copy_file_range is not available")
+    with open(source_path, 'rb') as source, open(tmp_path, 'wb') as dest:
+        remaining = os.fstat(source.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(source.fileno(), dest.fileno(), min(remaining, _COPY_RANGE_CHUNK))
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(source_path, tmp_path)
+
+def _place(source_path, tmp_path, strategy):
+    if strategy == 'hardlink':
+        os.link(source_path, tmp_path)
+    elif strategy == 'reflink':
+        _reflink(source_path, tmp_path)
+    elif strategy == 'symlink':
+        # os.symlink() happily creates a dangling link
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), source_path)
+        os.symlink(os.path.abspath(source_path), tmp_path)
+    else:
+        shutil.copy2(source_path, tmp_path)
+
+def transfer_file(source_path, dest_path, strategy='copy'):
+    """
+    Places source_path at dest_path with the given strategy, replacing any
+    existing destination file atomically.
+
+    The file is created under a temporary name in the destination directory
+    and renamed into place, so readers never see a partial file. If the
+    strategy is not supported for this pair of paths (e.g. a hard link across
+    filesystems) the file is copied instead.
+
+    Args:
+        source_path (str): The existing source file.
+        dest_path (str): The destination file path; its directory must exist.
+        strategy (str): One of TRANSFER_STRATEGIES.
+
+    Returns:
+        str: The strategy actually used ('copy' after a fallback), or 'skipped'
+             if dest_path already is a hard link to source_path.
+    """
+    if strategy not in TRANSFER_STRATEGIES:
+        raise ValueError(f"Unknown transfer strategy '{strategy}'")
+    if strategy == 'hardlink':
+        try:
+            if os.path.samefile(source_path, dest_path) and not os.path.islink(dest_path):
+                return 'skipped'
+        except OSError:
+            pass
+
+    tmp_path = os.path.join(os.path.dirname(dest_path),
+                            f".{os.path.basename(dest_path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        try:
+            _place(source_path, tmp_path, strategy)
+            used = strategy
+        except OSError as e:
+            if strategy == 'copy' or e.errno not in _FALLBACK_ERRNOS:
+                raise
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            shutil.copy2(source_path, tmp_path)
+            used = 'copy'
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return used
+
+def run_bounded(func, items, workers, max_pending=None, on_result=None,
+                executor_class=ThreadPoolExecutor, initializer=None):
+    """
+    Runs func(item) for every item in a worker pool, keeping at most max_pending
+    calls queued or running, so items from a large generator are not all
+    submitted up front.
+
+    Args:
+        func (callable): The per-item function; I/O-bound work releases the GIL.
+        items (iterable): The work items, consumed lazily.
+        workers (int): Number of threads (or processes).
+        max_pending (int): Bound on submitted but unfinished calls (default: 4 * workers).
+        on_result (callable): Called in the submitting thread as on_result(item, result, error)
+                              for each finished call; error is the exception or None.
+        executor_class (type): ProcessPoolExecutor for CPU-bound work; func and the
+                               items must then be picklable.
+        initializer (callable): Run once in each worker before any item.
+    """
+    max_pending = max_pending or 4 * workers
+    with executor_class(max_workers=workers, initializer=initializer) as pool:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                if on_result is not None:
+                    on_result(item, None if error else future.result(), error)
+                elif error is not None:
+                    logging.error(f"Error processing {item!r}: {error}")
+
+        for item in items:
+            if len(pending) >= max_pending:
+                drain(FIRST_COMPLETED)
+            pending[pool.submit(func, item)] = item
+        if pending:
+            drain(ALL_COMPLETED)
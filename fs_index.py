@@ -0,0 +1,116 @@
+# fs_index.py
+
+import os
+import posixpath
+from collections import namedtuple
+
+# Size and modification time of an indexed file
+FileInfo = namedtuple('FileInfo', ['size', 'mtime_ns'])
+
+class FileIndex:
+    """
+    In-memory index of a directory tree, built with one os.scandir() pass per
+    directory instead of an os.path.exists()/os.listdir() call per file.
+
+    Paths are relative to the root, use '/' separators, and '' is the root
+    itself. On network-mounted storage every lookup after the scan is free;
+    the index does not see changes made after it was built.
+    """
+
+    def __init__(self, root, with_stat=False, max_depth=None):
+        """
+        Scans the tree under root.
+
+        Args:
+            root (str): The directory to index.
+            with_stat (bool): Also record size and mtime of every file. This costs
+                              one stat call per file on POSIX (none on Windows),
+                              so leave it off when only existence matters.
+            max_depth (int): Do not descend below this many levels; 1 indexes
+                             only the root's own entries (default: no limit).
+
+        Raises:
+            FileNotFoundError: If root does not exist.
+        """
+        self.root = root
+        self.files = {}          # relative path -> FileInfo, or None without with_stat
+        self.dirs = {''}         # relative paths of all indexed directories
+        self.children = {}       # relative directory path -> entry names in it
+        self.directories_scanned = 0
+        self._scan(with_stat, max_depth)
+
+    def _scan(self, with_stat, max_depth):
+        pending = [(self.root, '', 1)]
+        while pending:
+            path, rel_dir, depth = pending.pop()
+            names = self.children.setdefault(rel_dir, [])
+            with os.scandir(path) as entries:
+                self.directories_scanned += 1
+                for entry in entries:
+                    names.append(entry.name)
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    # d_type answers this without a stat call; symlinked directories are not followed
+                    if entry.is_dir(follow_symlinks=False):
+                        self.dirs.add(rel_path)
+                        if max_depth is None or depth < max_depth:
+                            pending.append((entry.path, rel_path, depth + 1))
+                    else:
+                        self.files[rel_path] = self._file_info(entry) if with_stat else None
+
+    @staticmethod
+    def _file_info(entry):
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            # A dangling symlink: describe the link itself
+            stat_result = entry.stat(follow_symlinks=False)
+        return FileInfo(stat_result.st_size, stat_result.st_mtime_ns)
+
+    @staticmethod
+    def key(path):
+        """
+        Normalizes a root-relative path to the index's key form.
+        """
+        key = posixpath.normpath(path.replace('\\', '/')).strip('/')
+        return '' if key == '.' else key
+
+    def exists(self, path):
+        """
+        Returns True if the root-relative path is an indexed file or directory.
+        """
+        key = self.key(path)
+        return key in self.files or key in self.dirs
+
+    def is_file(self, path):
+        """
+        Returns True if the root-relative path is an indexed non-directory entry.
+        """
+        return self.key(path) in self.files
+
+    def is_dir(self, path):
+        """
+        Returns True if the root-relative path is an indexed directory.
+        """
+        return self.key(path) in self.dirs
+
+    def info(self, path):
+        """
+        Returns the FileInfo of a root-relative file path, or None if it is not
+        indexed (or the index was built without with_stat).
+        """
+        return self.files.get(self.key(path))
+
+    def listdir(self, path=''):
+        """
+        Returns the entry names of an indexed directory, like os.listdir().
+
+        Raises:
+            FileNotFoundError: If the directory is not in the index.
+        """
+        key = self.key(path)
+        if key not in self.children:
+            raise FileNotFoundError(f"'{path}' is not an indexed directory under '{self.root}'")
+        return list(self.children[key])
+
+    def __len__(self):
+        return len(self.files)
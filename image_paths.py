@@ -0,0 +1,73 @@
+# image_paths.py
+
+import os
+import logging
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Image URL columns of the legacy 'property' table, in display order
+IMAGE_COLUMNS = [
+    'imgUrl',
+    'imgroom1Url',
+    'imgroom2Url',
+    'imgroom3Url',
+    'imgroom4Url',
+    'imgroom5Url',
+    'imgroom6Url',
+    'imgroom7Url',
+    'imgroom8Url'
+]
+
+# How image_path is stored in 'property_images':
+#   'url'      - the full (trimmed) URL, as migrate_properties.py has always written it
+#   'basename' - just the file name, as migrate_property_images.py writes it
+IMAGE_PATH_POLICIES = ('url', 'basename')
+
+def extract_image_name(image_url):
+    """
+    Extracts the image name from a given image URL.
+
+    Args:
+        image_url (str): The URL of the image.
+
+    Returns:
+        str: The extracted image name.
+    """
+    try:
+        path = urlparse(image_url).path
+        image_name = os.path.basename(path)
+        return image_name
+    except Exception as e:
+        logging.error(f"Error extracting image name from URL '{image_url}': {e}")
+        return None
+
+def unpivot_image_columns(record, property_id, path_policy='url'):
+    """
+    Turns the nine image URL columns of one legacy record into 'property_images' rows.
+
+    Args:
+        record (Mapping): A row from the legacy 'property' table.
+        property_id (int): The ID the image rows should reference.
+        path_policy (str): One of IMAGE_PATH_POLICIES.
+
+    Returns:
+        list: Dicts with property_id, image_path, created_at and updated_at.
+    """
+    now = datetime.now()
+    image_records = []
+    for img_col in IMAGE_COLUMNS:
+        image_url = record.get(img_col)
+        if not image_url or not image_url.strip():  # Check if image_url is not None and not empty
+            continue
+        image_path = image_url.strip()
+        if path_policy == 'basename':
+            image_path = extract_image_name(image_path)
+            if not image_path:
+                continue
+        image_records.append({
+            'property_id': property_id,
+            'image_path': image_path,
+            'created_at': now,
+            'updated_at': now
+        })
+    return image_records
@@ -1,18 +1,30 @@
 # migrate_properties.py
 
-import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select, insert
+from sqlalchemy import select, insert
+from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import sys
+import argparse
 import logging
-import re
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from image_paths import IMAGE_PATH_POLICIES, unpivot_image_columns
+from parsing import extract_numeric_price, extract_numeric_rooms, parse_price_column, parse_rooms_column
+from db import get_engine
+import schema
+from partitioning import compute_id_ranges, run_partitions
+from bulk_loader import LOADERS, insert_rows, resolve_loader
+from checkpoints import ensure_checkpoint_table, load_checkpoint, save_checkpoint, clear_checkpoint
+from update_price import JOB_NAME as PRICE_JOB_NAME
+
+# Define table names
+OLD_TABLE_NAME = 'property'          # Old table
+NEW_TABLE_NAME = 'properties_new'    # New table
+IMAGES_TABLE_NAME = 'property_images' # Images table
+
+# Checkpoints of jobs that rewrite migrated rows in place. They describe the
+# previous generation of 'properties_new', so a fresh migration clears them.
+DERIVED_JOB_NAMES = (PRICE_JOB_NAME,)
 
 def setup_logging():
     """
@@ -27,258 +39,354 @@ def setup_logging():
         ]
     )
 
-def extract_numeric_price(price_str):
+def transform_record(record, parsed_values=None, image_path_policy='url'):
     """
-    Extracts the first occurrence of a numeric value from a price string.
-    Removes commas and ignores any non-numeric characters.
-    
+    Maps a legacy 'property' record onto a 'properties_new' row and its image rows.
+
     Args:
-        price_str (str): The raw price string from the old table.
-    
+        record (Mapping): A row from the old table.
+        parsed_values (tuple): Optional (bedrooms, price) already parsed for this
+            record by the column parsers; parsed per record when omitted.
+        image_path_policy (str): How image paths are stored ('url' or 'basename').
+
     Returns:
-        float or None: The extracted numeric price, or None if extraction fails.
+        tuple: (new_prop dict, list of image record dicts)
     """
-    if not price_str:
-        return None
+    # Extract data from old record
+    old_id = record['ID']
+    description = record['Description']
+    rooms = record['rooms']
+    location = record['location']
+    price_str = record['Price']
+    category = record['Category']
+    propertytype = record['propertytype']
+
+    # Prepare data for properties_new
+    if parsed_values is None:
+        bedrooms = extract_numeric_rooms(rooms, propertytype)
+        price = extract_numeric_price(price_str)
+    else:
+        bedrooms, price = parsed_values
+
+    new_prop = {
+        'id': old_id,                       # Map ID to id
+        'location': location,               # Map location
+        'specific_location': record['Product'] if record['Product'] else None, # Map Product to specific_location
+        'county_name': None,                # Unmapped, set to NULL
+        'property_type': category if category else None,         # Map Category to property_type
+        'property_category': propertytype if propertytype else None, # Map propertytype to property_category
+        'description': description if description else None,      # Map Description
+        'bedrooms': bedrooms,                                       # Mapped bedrooms
+        'bathrooms': None,                # Unmapped, set to NULL
+        'currency': None,                 # Unmapped, set to NULL
+        'price': price,                   # Mapped price
+        'amenities': None,                # Unmapped, set to NULL
+        'is_featured': False,             # Ignore status, set to default FALSE
+        'created_at': datetime.now(),     # Set to current timestamp
+        'updated_at': datetime.now()      # Set to current timestamp
+    }
+
+    # Unpivot the image URL columns once, in this same pass
+    image_records = unpivot_image_columns(record, old_id, path_policy=image_path_policy)
 
-    # Remove commas to handle thousand separators
-    price_str_clean = price_str.replace(',', '')
+    return new_prop, image_records
 
-    # Use regex to find the first numeric value (integer or decimal)
-    match = re.search(r'\d+\.?\d*', price_str_clean)
-    if match:
+class BatchWriter:
+    """
+    Buffers transformed records and writes them with one executemany INSERT per
+    table, reusing a single insert() construct for each target table.
+
+    If a batch fails, it is split in halves inside savepoints until the bad
+    rows are isolated, so only O(log n) statements are replayed per bad row.
+
+    When a job_name is given, the highest source ID seen so far (high_water_mark)
+    is saved to the checkpoint table in the same transaction as each batch.
+
+    With loader='load-data' each batch is sent through LOAD DATA LOCAL INFILE
+    instead of executemany; a load that skips rows or raises warnings fails the
+    batch (bulk_loader.LoadDataError) and goes through the same isolation.
+    """
+
+    def __init__(self, session, new_table, images_table, batch_size=500, job_name=None, loader='insert'):
+        self.session = session
+        self.job_name = job_name
+        self.loader = loader
+        self.new_table = new_table
+        self.images_table = images_table
+        self.high_water_mark = None
+        self.property_insert = insert(new_table)
+        self.image_insert = insert(images_table)
+        self.batch_size = batch_size
+        self.pending = []
+        self.written = 0
+        self.failed = 0
+
+    def add(self, new_prop, image_records):
+        """
+        Queues one property with its images, flushing when the batch is full.
+        """
+        self.pending.append((new_prop, image_records))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _write(self, items):
+        """
+        Writes the properties and their images; returns the number of properties written.
+        """
+        props = [new_prop for new_prop, _ in items]
+        images = [image for _, image_records in items for image in image_records]
+        written = insert_rows(self.session, self.new_table, props, loader=self.loader, insert_stmt=self.property_insert)
+        insert_rows(self.session, self.images_table, images, loader=self.loader, insert_stmt=self.image_insert)
+        return written
+
+    def _write_isolating_failures(self, items):
+        try:
+            with self.session.begin_nested():
+                written = self._write(items)
+            self.written += written
+        except Exception as e:
+            if len(items) == 1:
+                self.failed += 1
+                logging.error(f"Error migrating record (ID: {items[0][0]['id']}): {e}")
+                return
+            middle = len(items) // 2
+            self._write_isolating_failures(items[:middle])
+            self._write_isolating_failures(items[middle:])
+
+    def _save_checkpoint(self):
+        if self.job_name and self.high_water_mark is not None:
+            save_checkpoint(self.session, self.job_name, self.high_water_mark)
+
+    def flush(self):
+        """
+        Writes and commits all queued records.
+        """
+        if not self.pending:
+            return
+        items, self.pending = self.pending, []
         try:
-            return float(match.group())
-        except ValueError:
-            logging.warning(f"Unable to convert extracted price to float: '{match.group()}' from original '{price_str}'")
-            return None
+            written = self._write(items)
+            self._save_checkpoint()
+            self.session.commit()
+            self.written += written
+        except Exception as e:
+            self.session.rollback()
+            logging.warning(f"Batch of {len(items)} records failed ({e}); isolating bad rows.")
+            self._write_isolating_failures(items)
+            self._save_checkpoint()
+            self.session.commit()
+        logging.info(f"Migrated {self.written} records so far.")
+
+def iter_record_chunks(connection, old_table, chunk_size, stream=False, id_range=None, after_id=None):
+    """
+    Yields lists of legacy records from the old table, chunk_size at a time.
+
+    In streaming mode the query runs on a server-side (unbuffered) cursor, so
+    only one chunk is held in memory at a time. Otherwise the whole result is
+    buffered by the driver, as before.
+
+    Args:
+        connection (Connection): Connection used only for reading.
+        old_table (Table): The legacy 'property' table.
+        chunk_size (int): Number of records per chunk.
+        stream (bool): Use a server-side cursor instead of fetchall().
+        id_range (tuple): Optional inclusive (low, high) bounds on 'ID'.
+        after_id (int): Optional keyset position; only records with a greater 'ID' are read.
+
+    Yields:
+        list: Up to chunk_size record mappings.
+    """
+    # Read in key order so the last ID of a batch is a valid resume position
+    stmt = select(old_table).order_by(old_table.c.ID)
+    if id_range is not None:
+        stmt = stmt.where(old_table.c.ID.between(*id_range))
+    if after_id is not None:
+        stmt = stmt.where(old_table.c.ID > after_id)
+    if stream:
+        stmt = stmt.execution_options(stream_results=True, yield_per=chunk_size)
+        result = connection.execute(stmt).mappings()
+        for partition in result.partitions(chunk_size):
+            yield partition
     else:
-        logging.warning(f"No numeric value found in price string: '{price_str}'")
-        return None
+        results = connection.execute(stmt).mappings().fetchall()
+        logging.info(f"Fetched {len(results)} records from '{old_table.name}' table.")
+        for i in range(0, len(results), chunk_size):
+            yield results[i:i + chunk_size]
 
-def word_to_num(word):
+def reflect_tables(engine, table_names):
     """
-    Converts a word representation of a number to its integer equivalent.
-    
-    Args:
-        word (str): The word representing the number (e.g., 'four').
-    
-    Returns:
-        int or None: The integer equivalent, or None if the word is not a valid number.
+    Reflects only the requested tables (cached per process) and returns them.
+
+    Exits the process if reflection fails or any table is missing.
     """
-    word = word.lower()
-    numbers = {
-        'zero': 0,
-        'one': 1,
-        'two': 2,
-        'three':3,
-        'four':4,
-        'five':5,
-        'six':6,
-        'seven':7,
-        'eight':8,
-        'nine':9,
-        'ten':10,
-        'eleven':11,
-        'twelve':12,
-        'thirteen':13,
-        'fourteen':14,
-        'fifteen':15,
-        'sixteen':16,
-        'seventeen':17,
-        'eighteen':18,
-        'nineteen':19,
-        'twenty':20
-        # Extend this dictionary as needed
-    }
-    return numbers.get(word, None)
+    try:
+        tables = schema.reflect_tables(engine, table_names)
+        logging.info(f"Reflected tables: {', '.join(table_names)}.")
+    except NoSuchTableError as e:
+        logging.error(f"Missing tables in the database: {e}")
+        sys.exit(1)
+    except Exception as e:
+        logging.error(f"Error reflecting metadata: {e}")
+        sys.exit(1)
+    return tables
 
-def extract_numeric_rooms(rooms_str, propertytype):
+def migrate_records(engine, args, id_range=None):
     """
-    Extracts the numeric value from the rooms string.
-    Converts word numbers to integers and ignores properties of type 'Plot'.
-    
+    Migrates legacy records (optionally only those in an ID range) into the new tables.
+
     Args:
-        rooms_str (str): The raw rooms string from the old table.
-        propertytype (str): The property type to check for exclusion.
-    
+        engine (Engine): The engine to read from and write to.
+        args (Namespace): Parsed command-line options.
+        id_range (tuple): Optional inclusive (low, high) bounds on 'ID'.
+
     Returns:
-        int or None: The extracted numeric bedrooms, or None if extraction fails or propertytype is 'Plot'.
+        dict: Counters for 'processed', 'written' and 'failed' records.
     """
-    if not rooms_str:
-        return None
+    old_table, new_table, images_table = reflect_tables(engine, [OLD_TABLE_NAME, NEW_TABLE_NAME, IMAGES_TABLE_NAME])
 
-    # Exclude properties of type 'Plot'
-    if propertytype.lower() == 'plot':
-        return None
+    # Create a session
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    logging.info("Database session created.")
 
-    # First, try to extract digits
-    match = re.search(r'\d+', rooms_str)
-    if match:
-        try:
-            return int(match.group())
-        except ValueError:
-            logging.warning(f"Unable to convert extracted rooms to int: '{match.group()}' from original '{rooms_str}'")
-            return None
-
-    # If no digits, try to extract word number
-    words = rooms_str.split()
-    for word in words:
-        num = word_to_num(word)
-        if num is not None:
-            return num
-
-    # If no valid number found
-    logging.warning(f"No numeric value found in rooms string: '{rooms_str}'")
-    return None
-
-def main():
-    # Setup logging
+    # Reads go through their own connection: an unbuffered cursor cannot share
+    # a connection with the inserts issued while it is still open.
+    read_connection = engine.connect()
+    if args.stream:
+        logging.info(f"Streaming '{OLD_TABLE_NAME}' in chunks of {args.chunk_size} records.")
+
+    # One checkpoint per job (and per ID range when running with workers)
+    job_name = 'migrate_properties' if id_range is None else f"migrate_properties:{id_range[0]}-{id_range[1]}"
+    if args.resume:
+        after_id = load_checkpoint(session, job_name)
+        if after_id is not None:
+            logging.info(f"Resuming job '{job_name}' after ID {after_id}.")
+    else:
+        after_id = None
+        clear_checkpoint(session, job_name)
+        session.commit()
+
+    writer = BatchWriter(session, new_table, images_table, batch_size=args.batch_size,
+                         job_name=job_name, loader=args.loader)
+
+    processed = 0
+    try:
+        for chunk in iter_record_chunks(read_connection, old_table, args.chunk_size, stream=args.stream,
+                                        id_range=id_range, after_id=after_id):
+            # Parse the Price/rooms columns of the whole chunk at once
+            bedrooms_column = parse_rooms_column([record['rooms'] for record in chunk],
+                                                 [record['propertytype'] for record in chunk])
+            price_column = parse_price_column([record['Price'] for record in chunk])
+            for record, bedrooms, price in zip(chunk, bedrooms_column, price_column):
+                processed += 1
+                writer.high_water_mark = record['ID']
+                try:
+                    new_prop, image_records = transform_record(record, parsed_values=(bedrooms, price),
+                                                                 image_path_policy=args.image_path_policy)
+                except Exception as e:
+                    writer.failed += 1
+                    logging.error(f"Error transforming record {processed} (ID: {record['ID']}): {e}")
+                    continue
+                writer.add(new_prop, image_records)
+        writer.flush()
+    finally:
+        read_connection.close()
+        # Close the session
+        session.close()
+        logging.info("Database session closed.")
+
+    return {'processed': processed, 'written': writer.written, 'failed': writer.failed}
+
+def migrate_partition(id_range, db_name, args):
+    """
+    Process-pool entry point: migrates one ID range on the worker process's own engine.
+    """
     setup_logging()
+    engine = get_engine(db_name, **engine_options(args))
+    return migrate_records(engine, args, id_range=id_range)
+
+def engine_options(args):
+    """
+    Returns extra get_engine() settings required by the selected loader.
+    """
+    if args.loader == 'load-data':
+        return {'local_infile': True}
+    return {}
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the migration.
+    """
+    parser = argparse.ArgumentParser(description="Migrate legacy 'property' rows into 'properties_new' and 'property_images'.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read the old table through a server-side cursor so memory stays flat.")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Number of legacy records read per chunk (default: 1000).")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Number of transformed records written per multi-row INSERT (default: 500).")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Split the old table into ID ranges and migrate them in this many processes (default: 1).")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue after the last checkpointed ID instead of starting from the first row. "
+                             "With --workers, use the same worker count as the interrupted run.")
+    parser.add_argument('--image-path-policy', choices=IMAGE_PATH_POLICIES, default='url',
+                        help="Store full image URLs ('url') or just file names ('basename', what "
+                             "migrate_property_images.py writes) in property_images (default: url).")
+    parser.add_argument('--loader', choices=LOADERS, default='insert',
+                        help="Write backend: executemany inserts, or LOAD DATA LOCAL INFILE for initial bulk loads "
+                             "(falls back to inserts when the server has local_infile disabled).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
 
-    # Database connection details
-    DB_USERNAME = 'root'        # Default XAMPP MySQL username
-    DB_PASSWORD = ''            # Default XAMPP MySQL password is empty
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'     # Replace with your actual database name
+    # Setup logging
+    setup_logging()
 
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
 
-    # Create SQLAlchemy engine
+    # Get the shared SQLAlchemy engine
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
+        engine = get_engine(DB_NAME, **engine_options(args))
         logging.info("Database engine created successfully.")
     except Exception as e:
         logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
-    # Initialize MetaData
-    metadata = MetaData()
-
-    # Reflect existing tables
     try:
-        metadata.reflect(bind=engine)
-        logging.info("Database schema reflected successfully.")
+        args.loader = resolve_loader(engine, args.loader)
+        ensure_checkpoint_table(engine)
+        if not args.resume:
+            with engine.begin() as connection:
+                for job_name in DERIVED_JOB_NAMES:
+                    clear_checkpoint(connection, job_name)
     except Exception as e:
-        logging.error(f"Error reflecting metadata: {e}")
+        logging.error(f"Error preparing migration: {e}")
         sys.exit(1)
 
-    # Define table names
-    old_table_name = 'property'          # Old table
-    new_table_name = 'properties_new'    # New table
-    images_table_name = 'property_images' # Images table
-
-    # Check if tables exist
-    missing_tables = []
-    for table_name in [old_table_name, new_table_name, images_table_name]:
-        if table_name not in metadata.tables:
-            missing_tables.append(table_name)
-    if missing_tables:
-        logging.error(f"Missing tables in the database: {', '.join(missing_tables)}")
-        sys.exit(1)
-
-    # Access tables
-    old_table = metadata.tables[old_table_name]
-    new_table = metadata.tables[new_table_name]
-    images_table = metadata.tables[images_table_name]
-
-    # Create a session
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    logging.info("Database session created.")
-
-    # Query all records from old_table using mappings()
     try:
-        stmt = select(old_table)
-        results = session.execute(stmt).mappings().fetchall()
-        logging.info(f"Fetched {len(results)} records from '{old_table_name}' table.")
+        if args.workers > 1:
+            old_table, = reflect_tables(engine, [OLD_TABLE_NAME])
+            with engine.connect() as connection:
+                id_ranges = compute_id_ranges(connection, old_table.c.ID, args.workers)
+            # The parent's pooled connections must not leak into forked workers
+            engine.dispose()
+            logging.info(f"Migrating {len(id_ranges)} ID ranges with {args.workers} worker processes.")
+            counts = run_partitions(migrate_partition, id_ranges, args.workers, DB_NAME, args)
+        else:
+            counts = migrate_records(engine, args)
     except Exception as e:
-        logging.error(f"Error fetching data from '{old_table_name}': {e}")
+        logging.error(f"Error migrating data from '{OLD_TABLE_NAME}': {e}")
         sys.exit(1)
 
-    total_records = len(results)
-    if total_records == 0:
-        logging.warning(f"No records found in '{old_table_name}' table to migrate.")
+    if counts['processed'] == 0:
+        logging.warning(f"No records found in '{OLD_TABLE_NAME}' table to migrate{' after the checkpoint' if args.resume else ''}.")
         sys.exit(0)
 
-    # Process each record
-    for idx, record in enumerate(results, start=1):
-        try:
-            # Extract data from old record
-            old_id = record['ID']
-            imgUrl = record['imgUrl']
-            description = record['Description']
-            rooms = record['rooms']
-            location = record['location']
-            price_str = record['Price']
-            category = record['Category']
-            propertytype = record['propertytype']
-
-            # Prepare data for properties_new
-            bedrooms = extract_numeric_rooms(rooms, propertytype)
-            price = extract_numeric_price(price_str)
-
-            new_prop = {
-                'id': old_id,                       # Map ID to id
-                'location': location,               # Map location
-                'specific_location': record['Product'] if record['Product'] else None, # Map Product to specific_location
-                'county_name': None,                # Unmapped, set to NULL
-                'property_type': category if category else None,         # Map Category to property_type
-                'property_category': propertytype if propertytype else None, # Map propertytype to property_category
-                'description': description if description else None,      # Map Description
-                'bedrooms': bedrooms,                                       # Mapped bedrooms
-                'bathrooms': None,                # Unmapped, set to NULL
-                'currency': None,                 # Unmapped, set to NULL
-                'price': price,                   # Mapped price
-                'amenities': None,                # Unmapped, set to NULL
-                'is_featured': False,             # Ignore status, set to default FALSE
-                'created_at': datetime.now(),     # Set to current timestamp
-                'updated_at': datetime.now()      # Set to current timestamp
-            }
-
-            # Insert into properties_new
-            insert_stmt = insert(new_table).values(new_prop)
-            session.execute(insert_stmt)
-
-            # Handle image URLs
-            image_fields = [
-                imgUrl,
-                record.get('imgroom1Url'),
-                record.get('imgroom2Url'),
-                record.get('imgroom3Url'),
-                record.get('imgroom4Url'),
-                record.get('imgroom5Url'),
-                record.get('imgroom6Url'),
-                record.get('imgroom7Url'),
-                record.get('imgroom8Url')
-            ]
-
-            image_records = []
-            for img_url in image_fields:
-                if img_url and img_url.strip():
-                    image_records.append({
-                        'property_id': old_id,       # Reference to the same ID
-                        'image_path': img_url.strip()
-                    })
-
-            if image_records:
-                session.execute(insert(images_table), image_records)
-
-            # Commit every 100 records to manage transaction size
-            if idx % 100 == 0 or idx == total_records:
-                session.commit()
-                logging.info(f"Migrated {idx}/{total_records} records.")
-
-        except Exception as e:
-            session.rollback()
-            logging.error(f"Error migrating record {idx} (ID: {record['ID']}): {e}")
-
-    # Close the session
-    session.close()
-    logging.info("Database session closed.")
-    logging.info("Migration completed successfully.")
+    if counts.get('failed_partitions'):
+        logging.error(f"{counts['failed_partitions']} partitions failed; see errors above.")
+    logging.info(f"Migration completed successfully. {counts['written']} records migrated, {counts['failed']} failed.")
 
 if __name__ == "__main__":
     main()
@@ -1,19 +1,25 @@
 # migrate_property_images.py
+#
+# Standalone re-run of the image step only. A full migration should use
+# `migrate_properties.py --image-path-policy basename`, which writes the same
+# rows from its single scan of 'property' instead of reading it a second time.
 
-import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select, insert
+from sqlalchemy import select
+from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
 import sys
 import logging
-from urllib.parse import urlparse
-import os
+import argparse
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from bulk_loader import LOADERS, insert_rows, resolve_loader
+from image_paths import IMAGE_COLUMNS, unpivot_image_columns
+from db import get_engine
+from schema import reflect_tables
+from partitioning import compute_id_ranges, run_partitions
+
+# Define table names
+SOURCE_TABLE_NAME = 'property'          # Source table
+TARGET_TABLE_NAME = 'property_images'   # Target table
 
 def setup_logging():
     """
@@ -28,174 +34,188 @@ def setup_logging():
         ]
     )
 
-def extract_image_name(image_url):
+def resolve_tables(engine):
     """
-    Extracts the image name from a given image URL.
+    Reflects the two tables and returns (source_table, target_table, primary_key_column).
 
-    Args:
-        image_url (str): The URL of the image.
-
-    Returns:
-        str: The extracted image name.
+    Exits the process if a table, image column or primary key is missing.
     """
+    # Reflect only the two tables used here
     try:
-        path = urlparse(image_url).path
-        image_name = os.path.basename(path)
-        return image_name
-    except Exception as e:
-        logging.error(f"Error extracting image name from URL '{image_url}': {e}")
-        return None
-
-def main():
-    # Setup logging
-    setup_logging()
-
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'  # Updated database name
-
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
-
-    # Create SQLAlchemy engine
-    try:
-        engine = create_engine(DATABASE_URL, echo=False)
-        logging.info("Database engine created successfully.")
-    except Exception as e:
-        logging.error(f"Error creating engine: {e}")
-        sys.exit(1)
-
-    # Initialize MetaData
-    metadata = MetaData()
-
-    # Reflect existing tables
-    try:
-        metadata.reflect(bind=engine)
+        source_table, target_table = reflect_tables(engine, [SOURCE_TABLE_NAME, TARGET_TABLE_NAME])
         logging.info("Database schema reflected successfully.")
+    except NoSuchTableError as e:
+        logging.error(f"Missing tables in the database: {e}")
+        sys.exit(1)
     except Exception as e:
         logging.error(f"Error reflecting metadata: {e}")
         sys.exit(1)
 
-    # Define table names
-    source_table_name = 'property'          # Source table
-    target_table_name = 'property_images'   # Target table
+    # Verify that all image columns exist in the source table
+    for img_col in IMAGE_COLUMNS:
+        if img_col not in source_table.c:
+            logging.error(f"Column '{img_col}' does not exist in '{SOURCE_TABLE_NAME}' table.")
+            sys.exit(1)
 
-    # Check if tables exist
-    if source_table_name not in metadata.tables:
-        logging.error(f"Source table '{source_table_name}' does not exist in the database.")
-        sys.exit(1)
-    if target_table_name not in metadata.tables:
-        logging.error(f"Target table '{target_table_name}' does not exist in the database.")
-        sys.exit(1)
+    # Determine the correct primary key column name
+    # Replace 'ID' with the actual primary key column name if different
+    primary_key_column = 'ID'
+    if primary_key_column not in source_table.c:
+        # If 'ID' does not exist, attempt to find the primary key
+        primary_keys = [key.name for key in source_table.primary_key]
+        if not primary_keys:
+            logging.error(f"No primary key found in '{SOURCE_TABLE_NAME}' table.")
+            sys.exit(1)
+        primary_key_column = primary_keys[0]
+        logging.info(f"Primary key column determined as '{primary_key_column}'.")
+
+    return source_table, target_table, primary_key_column
+
+def migrate_images(engine, id_range=None, loader='insert'):
+    """
+    Collects image URLs from the source table (optionally only an ID range) and
+    batch-inserts them into the target table.
 
-    # Access tables
-    source_table = metadata.tables[source_table_name]
-    target_table = metadata.tables[target_table_name]
+    Args:
+        engine (Engine): The engine to read from and write to.
+        id_range (tuple): Optional inclusive (low, high) bounds on the primary key.
+        loader (str): 'insert' for executemany, 'load-data' for LOAD DATA LOCAL INFILE.
+
+    Returns:
+        dict: Counters for 'processed' properties, 'written' images and 'failed' records.
+    """
+    source_table, target_table, primary_key_column = resolve_tables(engine)
 
     # Create a session
     Session = sessionmaker(bind=engine)
     session = Session()
     logging.info("Database session created.")
 
-    # Define image URL columns in the source table
-    image_columns = [
-        'imgUrl',
-        'imgroom1Url',
-        'imgroom2Url',
-        'imgroom3Url',
-        'imgroom4Url',
-        'imgroom5Url',
-        'imgroom6Url',
-        'imgroom7Url',
-        'imgroom8Url'
-    ]
-
-    # Verify that all image columns exist in the source table
-    for img_col in image_columns:
-        if img_col not in source_table.c:
-            logging.error(f"Column '{img_col}' does not exist in '{source_table_name}' table.")
-            sys.exit(1)
-
     # Fetch all records from the source table
+    stmt = select(source_table)
+    if id_range is not None:
+        stmt = stmt.where(source_table.c[primary_key_column].between(*id_range))
     try:
-        stmt = select(source_table)
         results = session.execute(stmt).mappings().fetchall()
-        logging.info(f"Fetched {len(results)} records from '{source_table_name}' table.")
+        logging.info(f"Fetched {len(results)} records from '{SOURCE_TABLE_NAME}' table.")
     except Exception as e:
-        logging.error(f"Error fetching data from '{source_table_name}': {e}")
-        sys.exit(1)
+        session.close()
+        raise RuntimeError(f"Error fetching data from '{SOURCE_TABLE_NAME}': {e}")
 
     total_records = len(results)
-    if total_records == 0:
-        logging.warning(f"No records found in '{source_table_name}' table to migrate.")
-        sys.exit(0)
+    failed = 0
 
     # Initialize a list to hold all new image records
     new_image_records = []
 
-    # Determine the correct primary key column name
-    # Replace 'ID' with the actual primary key column name if different
-    primary_key_column = 'ID'
-    if primary_key_column not in source_table.c:
-        # If 'ID' does not exist, attempt to find the primary key
-        primary_keys = [key.name for key in source_table.primary_key]
-        if not primary_keys:
-            logging.error(f"No primary key found in '{source_table_name}' table.")
-            sys.exit(1)
-        primary_key_column = primary_keys[0]
-        logging.info(f"Primary key column determined as '{primary_key_column}'.")
-
     # Iterate through each property and collect image URLs
     for idx, record in enumerate(results, start=1):
         try:
             property_id = record[primary_key_column]
-            for img_col in image_columns:
-                image_url = record[img_col]
-                if image_url and image_url.strip():  # Check if image_url is not None and not empty
-                    image_name = extract_image_name(image_url)
-                    if image_name:
-                        new_image = {
-                            'property_id': property_id,
-                            'image_path': image_name,
-                            'created_at': datetime.now(),
-                            'updated_at': datetime.now()
-                        }
-                        new_image_records.append(new_image)
+            new_image_records.extend(unpivot_image_columns(record, property_id, path_policy='basename'))
             if idx % 1000 == 0:
                 logging.info(f"Processed {idx}/{total_records} properties.")
         except KeyError as ke:
+            failed += 1
             logging.error(f"KeyError for record {idx}: {ke}. Check if the primary key column '{primary_key_column}' exists.")
             continue
         except Exception as e:
+            failed += 1
             logging.error(f"Unexpected error processing record {idx}: {e}")
             continue
 
     logging.info(f"Total images to insert: {len(new_image_records)}")
 
-    if not new_image_records:
-        logging.warning("No image URLs found to migrate.")
-        sys.exit(0)
-
     # Batch insert the new image records
+    written = 0
     try:
         batch_size = 1000  # Adjust the batch size as needed
         for i in range(0, len(new_image_records), batch_size):
             batch = new_image_records[i:i + batch_size]
-            session.execute(insert(target_table), batch)
+            written += insert_rows(session, target_table, batch, loader=loader)
             session.commit()
             logging.info(f"Inserted batch {i//batch_size + 1}: {len(batch)} records.")
     except Exception as e:
         session.rollback()
-        logging.error(f"Error inserting image records: {e}")
+        raise RuntimeError(f"Error inserting image records: {e}")
+    finally:
+        # Close the session
+        session.close()
+        logging.info("Database session closed.")
+
+    return {'processed': total_records, 'written': written, 'failed': failed}
+
+def migrate_partition(id_range, db_name, loader):
+    """
+    Process-pool entry point: migrates the images of one ID range on the worker process's own engine.
+    """
+    setup_logging()
+    engine = get_engine(db_name, **engine_options(loader))
+    return migrate_images(engine, id_range=id_range, loader=loader)
+
+def engine_options(loader):
+    """
+    Returns extra get_engine() settings required by the selected loader.
+    """
+    if loader == 'load-data':
+        return {'local_infile': True}
+    return {}
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the image migration.
+    """
+    parser = argparse.ArgumentParser(description="Copy image URLs from 'property' into 'property_images'.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Split the source table into ID ranges and migrate them in this many processes (default: 1).")
+    parser.add_argument('--loader', choices=LOADERS, default='insert',
+                        help="Write backend: executemany inserts, or LOAD DATA LOCAL INFILE for initial bulk loads "
+                             "(falls back to inserts when the server has local_infile disabled).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Setup logging
+    setup_logging()
+
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
+
+    # Get the shared SQLAlchemy engine
+    try:
+        engine = get_engine(DB_NAME, **engine_options(args.loader))
+        logging.info("Database engine created successfully.")
+    except Exception as e:
+        logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
-    # Close the session
-    session.close()
-    logging.info("Database session closed.")
-    logging.info("Property images migration completed successfully.")
+    try:
+        loader = resolve_loader(engine, args.loader)
+        if args.workers > 1:
+            source_table, _, primary_key_column = resolve_tables(engine)
+            with engine.connect() as connection:
+                id_ranges = compute_id_ranges(connection, source_table.c[primary_key_column], args.workers)
+            # The parent's pooled connections must not leak into forked workers
+            engine.dispose()
+            logging.info(f"Migrating images for {len(id_ranges)} ID ranges with {args.workers} worker processes.")
+            counts = run_partitions(migrate_partition, id_ranges, args.workers, DB_NAME, loader)
+        else:
+            counts = migrate_images(engine, loader=loader)
+    except Exception as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+    if counts['processed'] == 0:
+        logging.warning(f"No records found in '{SOURCE_TABLE_NAME}' table to migrate.")
+        sys.exit(0)
+    if counts['written'] == 0:
+        logging.warning("No image URLs found to migrate.")
+        sys.exit(0)
+
+    if counts.get('failed_partitions'):
+        logging.error(f"{counts['failed_partitions']} partitions failed; see errors above.")
+    logging.info(f"Property images migration completed successfully. {counts['written']} images inserted.")
 
 if __name__ == "__main__":
     main()
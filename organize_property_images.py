@@ -2,17 +2,28 @@
 
 import os
 import sys
-import shutil
+import argparse
 import logging
-import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select
+from collections import Counter
+from sqlalchemy import select
+from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.orm import sessionmaker
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from db import get_engine
+from schema import get_table
+from file_transfer import TRANSFER_STRATEGIES, default_strategy, transfer_file, run_bounded
+from fs_index import FileIndex
+from sync_manifest import load_manifest, save_manifest, file_digest, manifest_entry, is_unchanged
+
+# Source and destination directories
+SOURCE_DIR = 'source_images'  # Directory where source images are stored
+DEST_DIR = 'uploads'          # Destination directory for organized images
+
+# Sync manifest file, kept inside the destination directory by default
+MANIFEST_NAME = '.organize_manifest.json'
+
+# Log progress every this many images
+PROGRESS_EVERY = 5000
 
 def setup_logging():
     """
@@ -27,53 +38,187 @@ def setup_logging():
         ]
     )
 
-def main():
-    # Setup logging
-    setup_logging()
+def parse_args(argv=None):
+    """
+    Parses command-line options for organizing the images.
+    """
+    parser = argparse.ArgumentParser(description="Place property images into per-property folders under the uploads directory.")
+    parser.add_argument('--source-dir', default=SOURCE_DIR,
+                        help=f"Directory where the source images are stored (default: {SOURCE_DIR}).")
+    parser.add_argument('--dest-dir', default=DEST_DIR,
+                        help=f"Destination directory for the per-property folders (default: {DEST_DIR}).")
+    parser.add_argument('--strategy', choices=TRANSFER_STRATEGIES,
+                        help="How each image is placed: hard link, reflink/copy_file_range, symlink or full copy "
+                             "(default: hardlink when source and destination share a filesystem, otherwise copy).")
+    parser.add_argument('--workers', type=int, default=8,
+                        help="Number of threads placing images in parallel (default: 8).")
+    parser.add_argument('--manifest',
+                        help=f"Sync manifest recording what was placed, so later runs only place new or changed "
+                             f"images (default: <dest-dir>/{MANIFEST_NAME}).")
+    parser.add_argument('--hash', action='store_true',
+                        help="Also record a SHA-256 of each placed image; a source whose size or mtime changed "
+                             "but whose content did not is then not placed again.")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the manifest and place every image again.")
+    parser.add_argument('--prune', action='store_true',
+                        help="Delete destination images that no longer appear in 'property_images' "
+                             "(by default they are only reported).")
+    return parser.parse_args(argv)
 
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'  # Replace with your actual database name
+def manifest_key(property_id, image_name):
+    """
+    Returns an image's destination path relative to the destination directory, as stored in the manifest.
+    """
+    return f"{property_id}/{image_name}"
 
-    # Source and destination directories
-    SOURCE_DIR = 'source_images'  # Directory where source images are stored
-    DEST_DIR = 'uploads'          # Destination directory for organized images
+def organize_images(images_by_property, source_index, dest_index, strategy, workers, manifest, use_hash=False):
+    """
+    Places every new or changed image in dest_dir/<property_id>/ using a thread
+    pool with a bounded work queue.
 
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
+    An image is unchanged, and not placed again, when its manifest entry matches
+    the source's size and mtime (or, with use_hash, its content) and the
+    destination file still exists. Existence, size and mtime come from the
+    directory indexes, so no image is stat'ed individually.
 
-    # Create SQLAlchemy engine
-    try:
-        engine = create_engine(DATABASE_URL, echo=False)
-        logging.info("Database engine created successfully.")
-    except Exception as e:
-        logging.error(f"Error creating engine: {e}")
-        sys.exit(1)
+    Args:
+        images_by_property (dict): property_id -> list of image file names.
+        source_index (FileIndex): Index of the source directory, built with_stat.
+        dest_index (FileIndex): Index of the destination directory.
+        strategy (str): One of file_transfer.TRANSFER_STRATEGIES.
+        workers (int): Number of threads.
+        manifest (dict): Entries from sync_manifest.load_manifest(); updated in place.
+        use_hash (bool): Record and compare SHA-256 digests of the sources.
+
+    Returns:
+        Counter: Images per strategy used, plus 'unchanged', 'missing' and 'failed'.
+    """
+    counts = Counter()
+    source_dir = source_index.root
+    dest_dir = dest_index.root
+
+    def jobs():
+        for property_id, image_paths in images_by_property.items():
+            property_dir = os.path.join(dest_dir, str(property_id))
+            if not dest_index.is_dir(str(property_id)):
+                os.makedirs(property_dir, exist_ok=True)
+            for image_name in image_paths:
+                yield (manifest_key(property_id, image_name), image_name,
+                       os.path.join(source_dir, image_name), os.path.join(property_dir, image_name))
+
+    def place(job):
+        key, image_name, source_image_path, destination_image_path = job
+        source_info = source_index.info(image_name)
+        if source_info is None:
+            return 'missing', None
+        entry = manifest.get(key)
+        dest_exists = dest_index.is_file(key)
+        if is_unchanged(entry, source_info) and dest_exists:
+            return 'unchanged', entry
+
+        digest = file_digest(source_image_path) if use_hash else None
+        new_entry = manifest_entry(source_info, digest)
+        if digest and entry is not None and entry.get('sha256') == digest and dest_exists:
+            # Touched but identical; only the recorded mtime moves
+            return 'unchanged', new_entry
+        return transfer_file(source_image_path, destination_image_path, strategy), new_entry
+
+    def record(job, result, error):
+        key, image_name, source_image_path, destination_image_path = job
+        if error is not None:
+            counts['failed'] += 1
+            logging.error(f"Error placing '{image_name}' in '{os.path.dirname(destination_image_path)}': {error}")
+            return
+        outcome, entry = result
+        if outcome == 'missing':
+            counts['missing'] += 1
+            manifest.pop(key, None)
+            logging.warning(f"Source image '{image_name}' does not exist in '{source_dir}'.")
+        else:
+            counts[outcome] += 1
+            manifest[key] = entry
+        done = sum(counts.values())
+        if done % PROGRESS_EVERY == 0:
+            logging.info(f"Processed {done} images: {dict(counts)}")
+
+    run_bounded(place, jobs(), workers, on_result=record)
+    return counts
 
-    # Initialize MetaData
-    metadata = MetaData()
+def find_stale_images(dest_index, expected):
+    """
+    Lists destination images that no longer appear in 'property_images'.
+
+    Only files directly inside per-property folders (numeric folder names) are
+    considered; hidden files such as the manifest are ignored.
+
+    Args:
+        dest_index (FileIndex): Index of the destination directory.
+        expected (set): manifest_key() of every current image.
+
+    Returns:
+        list: Paths of the stale files, relative to the destination directory.
+    """
+    stale = []
+    for key in dest_index.files:
+        property_dir, _, file_name = key.partition('/')
+        if not property_dir.isdigit() or not file_name or '/' in file_name or file_name.startswith('.'):
+            continue
+        if key not in expected:
+            stale.append(key)
+    return sorted(stale)
+
+def prune_images(dest_dir, stale):
+    """
+    Deletes stale destination images, and per-property folders left empty.
 
-    # Reflect existing tables
+    Returns:
+        int: The number of files deleted.
+    """
+    removed = 0
+    for key in stale:
+        path = os.path.join(dest_dir, *key.split('/'))
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logging.error(f"Error removing stale image '{path}': {e}")
+    for property_dir in {key.split('/', 1)[0] for key in stale}:
+        try:
+            os.rmdir(os.path.join(dest_dir, property_dir))
+        except OSError:
+            pass  # Not empty
+    return removed
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Setup logging
+    setup_logging()
+
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
+
+    # Get the shared SQLAlchemy engine
     try:
-        metadata.reflect(bind=engine)
-        logging.info("Database schema reflected successfully.")
+        engine = get_engine(DB_NAME)
+        logging.info("Database engine created successfully.")
     except Exception as e:
-        logging.error(f"Error reflecting metadata: {e}")
+        logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
     # Define table name
     table_name = 'property_images'
 
-    # Check if table exists
-    if table_name not in metadata.tables:
+    # Reflect only the table used here
+    try:
+        table = get_table(engine, table_name)
+        logging.info(f"Table '{table_name}' reflected successfully.")
+    except NoSuchTableError:
         logging.error(f"Table '{table_name}' does not exist in the database.")
         sys.exit(1)
-
-    # Access table
-    table = metadata.tables[table_name]
+    except Exception as e:
+        logging.error(f"Error reflecting metadata: {e}")
+        sys.exit(1)
 
     # Create a session
     Session = sessionmaker(bind=engine)
@@ -93,41 +238,68 @@ def main():
         logging.warning(f"No records found in '{table_name}' table.")
         sys.exit(0)
 
-    # Organize images by property_id
+    # Close the session; the file work below needs no database connection
+    session.close()
+    logging.info("Database session closed.")
+
+    # Organize images by property_id; duplicate rows would race on the same destination file
     images_by_property = {}
     for property_id, image_path in results:
         if property_id not in images_by_property:
             images_by_property[property_id] = []
-        images_by_property[property_id].append(image_path)
+        if image_path not in images_by_property[property_id]:
+            images_by_property[property_id].append(image_path)
+
+    if not os.path.isdir(args.source_dir):
+        logging.error(f"Source directory '{args.source_dir}' does not exist.")
+        sys.exit(1)
 
     # Create the uploads directory if it doesn't exist
-    if not os.path.exists(DEST_DIR):
-        os.makedirs(DEST_DIR)
-        logging.info(f"Created directory '{DEST_DIR}'.")
-
-    # Process each property_id
-    for property_id, image_paths in images_by_property.items():
-        property_dir = os.path.join(DEST_DIR, str(property_id))
-        os.makedirs(property_dir, exist_ok=True)
-        logging.info(f"Processing property_id {property_id} with {len(image_paths)} images.")
-
-        for image_name in image_paths:
-            source_image_path = os.path.join(SOURCE_DIR, image_name)
-            destination_image_path = os.path.join(property_dir, image_name)
-
-            if os.path.exists(source_image_path):
-                try:
-                    shutil.copy2(source_image_path, destination_image_path)
-                    logging.info(f"Copied '{image_name}' to '{property_dir}'.")
-                except Exception as e:
-                    logging.error(f"Error copying '{image_name}': {e}")
-            else:
-                logging.warning(f"Source image '{image_name}' does not exist in '{SOURCE_DIR}'.")
-
-    # Close the session
-    session.close()
-    logging.info("Database session closed.")
-    logging.info("Image files organized successfully.")
+    if not os.path.exists(args.dest_dir):
+        os.makedirs(args.dest_dir)
+        logging.info(f"Created directory '{args.dest_dir}'.")
+
+    # One scandir pass over each tree instead of a stat per image
+    source_index = FileIndex(args.source_dir, with_stat=True)
+    dest_index = FileIndex(args.dest_dir)
+    logging.info(f"Indexed {len(source_index)} source files in {source_index.directories_scanned} directories "
+                 f"and {len(dest_index)} destination files in {dest_index.directories_scanned} directories.")
+
+    manifest_path = args.manifest or os.path.join(args.dest_dir, MANIFEST_NAME)
+    manifest = {} if args.full else load_manifest(manifest_path, args.source_dir)
+
+    strategy = args.strategy or default_strategy(args.source_dir, args.dest_dir)
+    total = sum(len(paths) for paths in images_by_property.values())
+    logging.info(f"Syncing {total} images for {len(images_by_property)} properties "
+                 f"with strategy '{strategy}' and {args.workers} workers ({len(manifest)} in the manifest).")
+
+    try:
+        counts = organize_images(images_by_property, source_index, dest_index, strategy,
+                                 max(1, args.workers), manifest, use_hash=args.hash)
+    finally:
+        # Keep what was placed so far, even after an interruption
+        expected = {manifest_key(property_id, image_name)
+                    for property_id, image_paths in images_by_property.items() for image_name in image_paths}
+        for key in [key for key in manifest if key not in expected]:
+            del manifest[key]
+        try:
+            save_manifest(manifest_path, args.source_dir, manifest)
+        except Exception as e:
+            logging.error(f"Error saving manifest '{manifest_path}': {e}")
+    logging.info(f"Image files organized: {dict(counts)}")
+
+    stale = find_stale_images(dest_index, expected)
+    if stale and args.prune:
+        removed = prune_images(args.dest_dir, stale)
+        logging.info(f"Removed {removed} destination images that are no longer in '{table_name}'.")
+    elif stale:
+        for key in stale[:20]:
+            logging.info(f"Stale destination image: {key}")
+        logging.warning(f"{len(stale)} destination images are no longer in '{table_name}'; "
+                        f"run with --prune to remove them.")
+
+    if counts['failed']:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
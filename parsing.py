@@ -0,0 +1,247 @@
+# parsing.py
+
+import re
+import logging
+from functools import lru_cache
+
+# Precompiled patterns, shared by the per-value and the column (pandas) paths
+PRICE_PATTERN = re.compile(r'(\d+(?:\.\d*)?)\s*(k|thousand|m|mn|million|b|bn|billion)?\b', re.IGNORECASE)
+ROOMS_DIGITS_PATTERN = re.compile(r'(\d+)')
+WORD_SPLIT_PATTERN = re.compile(r'[\s\-,]+')
+
+# Multipliers for price suffixes such as "2.5M", "80k" or "Ksh 25 million"
+PRICE_SUFFIX_MULTIPLIERS = {
+    'k': 1_000,
+    'thousand': 1_000,
+    'm': 1_000_000,
+    'mn': 1_000_000,
+    'million': 1_000_000,
+    'b': 1_000_000_000,
+    'bn': 1_000_000_000,
+    'billion': 1_000_000_000,
+}
+
+UNIT_WORDS = {
+    'zero': 0,
+    'one': 1,
+    'two': 2,
+    'three': 3,
+    'four': 4,
+    'five': 5,
+    'six': 6,
+    'seven': 7,
+    'eight': 8,
+    'nine': 9,
+    'ten': 10,
+    'eleven': 11,
+    'twelve': 12,
+    'thirteen': 13,
+    'fourteen': 14,
+    'fifteen': 15,
+    'sixteen': 16,
+    'seventeen': 17,
+    'eighteen': 18,
+    'nineteen': 19,
+}
+
+TENS_WORDS = {
+    'twenty': 20,
+    'thirty': 30,
+    'forty': 40,
+    'fifty': 50,
+    'sixty': 60,
+    'seventy': 70,
+    'eighty': 80,
+    'ninety': 90,
+}
+
+def _parse_number_words(tokens):
+    """
+    Parses the longest number-word phrase at the start of a token list.
+
+    Handles units, tens, compounds ("twenty one", "twenty-one") and "hundred".
+
+    Returns:
+        int or None: The value, or None if the first token is not a number word.
+    """
+    total = None
+    current = 0
+    seen_unit = False
+    for token in tokens:
+        if token in TENS_WORDS and current % 100 == 0:
+            current += TENS_WORDS[token]
+            seen_unit = False
+        elif token in UNIT_WORDS and not seen_unit and (current % 100 == 0 or (current % 10 == 0 and UNIT_WORDS[token] < 10)):
+            current += UNIT_WORDS[token]
+            seen_unit = True
+        elif token == 'hundred' and total is not None and 0 < current < 100:
+            current *= 100
+            seen_unit = False
+        elif token == 'and' and total is not None:
+            continue
+        else:
+            break
+        total = current
+    return total
+
+def word_to_num(word):
+    """
+    Converts a word representation of a number to its integer equivalent.
+
+    Args:
+        word (str): The word or phrase representing the number (e.g., 'four', 'twenty one').
+
+    Returns:
+        int or None: The integer equivalent, or None if the word is not a valid number.
+    """
+    tokens = [token for token in WORD_SPLIT_PATTERN.split(word.lower()) if token]
+    return _parse_number_words(tokens) if tokens else None
+
+@lru_cache(maxsize=None)
+def extract_numeric_price(price_str):
+    """
+    Extracts the first numeric value from a price string.
+    Removes commas and applies suffixes such as 'k', 'M' or 'million'.
+
+    Results are memoized per distinct string, since the legacy data repeats a
+    small set of values many times.
+
+    Args:
+        price_str (str): The raw price string from the old table.
+
+    Returns:
+        float or None: The extracted numeric price, or None if extraction fails.
+    """
+    if not price_str:
+        return None
+
+    # Remove commas to handle thousand separators
+    match = PRICE_PATTERN.search(price_str.replace(',', ''))
+    if not match:
+        logging.warning(f"No numeric value found in price string: '{price_str}'")
+        return None
+
+    number, suffix = match.groups()
+    try:
+        value = float(number)
+    except ValueError:
+        logging.warning(f"Unable to convert extracted price to float: '{number}' from original '{price_str}'")
+        return None
+    if suffix:
+        value *= PRICE_SUFFIX_MULTIPLIERS[suffix.lower()]
+    return value
+
+@lru_cache(maxsize=None)
+def _extract_rooms(rooms_str):
+    # First, try to extract digits
+    match = ROOMS_DIGITS_PATTERN.search(rooms_str)
+    if match:
+        return int(match.group())
+
+    # If no digits, look for the first number-word phrase
+    tokens = [token for token in WORD_SPLIT_PATTERN.split(rooms_str.lower()) if token]
+    for idx in range(len(tokens)):
+        num = _parse_number_words(tokens[idx:])
+        if num is not None:
+            return num
+
+    # If no valid number found
+    logging.warning(f"No numeric value found in rooms string: '{rooms_str}'")
+    return None
+
+def extract_numeric_rooms(rooms_str, propertytype):
+    """
+    Extracts the numeric value from the rooms string.
+    Converts word numbers to integers and ignores properties of type 'Plot'.
+
+    Args:
+        rooms_str (str): The raw rooms string from the old table.
+        propertytype (str): The property type to check for exclusion.
+
+    Returns:
+        int or None: The extracted numeric bedrooms, or None if extraction fails or propertytype is 'Plot'.
+    """
+    if not rooms_str:
+        return None
+
+    # Exclude properties of type 'Plot'
+    if propertytype and propertytype.lower() == 'plot':
+        return None
+
+    return _extract_rooms(rooms_str)
+
+def _load_pandas():
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    return pd
+
+def _to_python(value):
+    # pandas hands back NaN / numpy scalars; the inserts want None / int / float
+    if value is None or value != value:
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def parse_price_column(price_values):
+    """
+    Parses a whole column of price strings.
+
+    Each distinct value is parsed once; with pandas installed the distinct values
+    go through a vectorized str.extract, otherwise through the memoized parser.
+
+    Args:
+        price_values (iterable): Raw price strings (None allowed).
+
+    Returns:
+        list: Floats or None, aligned with the input.
+    """
+    price_values = list(price_values)
+    pd = _load_pandas()
+    if pd is None:
+        return [extract_numeric_price(value) for value in price_values]
+
+    distinct = pd.Series(pd.unique(pd.Series(price_values, dtype='object')), dtype='object')
+    extracted = distinct.str.replace(',', '', regex=False).str.extract(PRICE_PATTERN)
+    numbers = pd.to_numeric(extracted[0], errors='coerce')
+    multipliers = extracted[1].str.lower().map(PRICE_SUFFIX_MULTIPLIERS).fillna(1)
+    parsed = dict(zip(distinct, numbers * multipliers))
+    return [_to_python(parsed.get(value)) if value else None for value in price_values]
+
+def parse_rooms_column(rooms_values, propertytype_values):
+    """
+    Parses a whole column of rooms strings, skipping 'Plot' properties.
+
+    Digits are pulled out of the distinct values with a vectorized str.extract
+    when pandas is available; values without digits fall back to the
+    memoized number-word parser.
+
+    Args:
+        rooms_values (iterable): Raw rooms strings (None allowed).
+        propertytype_values (iterable): Property types, aligned with rooms_values.
+
+    Returns:
+        list: Ints or None, aligned with the input.
+    """
+    rooms_values = list(rooms_values)
+    propertytype_values = list(propertytype_values)
+    pd = _load_pandas()
+    if pd is None:
+        return [extract_numeric_rooms(rooms, propertytype)
+                for rooms, propertytype in zip(rooms_values, propertytype_values)]
+
+    distinct = pd.Series(pd.unique(pd.Series(rooms_values, dtype='object')), dtype='object')
+    digits = pd.to_numeric(distinct.str.extract(ROOMS_DIGITS_PATTERN)[0], errors='coerce')
+    parsed = {}
+    for value, number in zip(distinct, digits):
+        if not value:
+            continue
+        parsed[value] = int(number) if number == number else _extract_rooms(value)
+
+    results = []
+    for rooms, propertytype in zip(rooms_values, propertytype_values):
+        if not rooms or (propertytype and propertytype.lower() == 'plot'):
+            results.append(None)
+        else:
+            results.append(parsed[rooms])
+    return results
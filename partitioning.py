@@ -0,0 +1,88 @@
+# partitioning.py
+
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import select, func
+
+def compute_id_ranges(connection, column, parts):
+    """
+    Splits a table into contiguous primary-key ranges holding roughly equal row counts.
+
+    Boundaries are taken from the key itself (keyset boundaries) rather than by
+    dividing MIN..MAX evenly, so gaps in the ID sequence do not leave some
+    partitions empty and others overloaded.
+
+    Args:
+        connection (Connection): An open database connection.
+        column (Column): The integer primary-key column to partition on.
+        parts (int): The desired number of partitions.
+
+    Returns:
+        list: Inclusive (low, high) tuples, ordered by low. Empty if the table is empty.
+    """
+    total_rows = connection.execute(select(func.count()).select_from(column.table)).scalar()
+    if not total_rows:
+        return []
+
+    parts = max(1, min(parts, total_rows))
+    boundaries = []
+    for part in range(parts):
+        offset = part * total_rows // parts
+        boundary = connection.execute(
+            select(column).order_by(column).offset(offset).limit(1)
+        ).scalar()
+        if not boundaries or boundary != boundaries[-1]:
+            boundaries.append(boundary)
+    max_id = connection.execute(select(func.max(column))).scalar()
+
+    ranges = []
+    for idx, low in enumerate(boundaries):
+        high = boundaries[idx + 1] - 1 if idx + 1 < len(boundaries) else max_id
+        ranges.append((low, high))
+    return ranges
+
+def run_partitions(worker, id_ranges, workers, *args):
+    """
+    Runs worker(id_range, *args) for each range in a process pool and merges the results.
+
+    The worker must be a module-level function (so it can be pickled) that opens
+    its own engine and connection, and returns a dict of counters such as
+    {'processed': ..., 'written': ..., 'failed': ...}.
+
+    Args:
+        worker (callable): The per-partition function.
+        id_ranges (list): Inclusive (low, high) tuples from compute_id_ranges().
+        workers (int): Maximum number of worker processes.
+        *args: Extra picklable arguments passed to every worker call.
+
+    Returns:
+        Counter: The summed counters of all partitions, plus 'failed_partitions'.
+    """
+    totals = Counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(worker, id_range, *args): id_range for id_range in id_ranges}
+        for done, future in enumerate(as_completed(futures), start=1):
+            low, high = futures[future]
+            try:
+                counts = future.result()
+            except Exception as e:
+                totals['failed_partitions'] += 1
+                logging.error(f"Partition {low}-{high} failed: {e}")
+                continue
+            totals.update(counts)
+            logging.info(f"Partition {low}-{high} finished ({done}/{len(futures)}): {dict(counts)}. Totals so far: {dict(totals)}")
+    return totals
+
+def iter_id_chunks(connection, column, chunk_size):
+    """
+    Yields inclusive (low, high) primary-key ranges of at most chunk_size IDs,
+    covering MIN(column)..MAX(column).
+
+    Used to bound set-based UPDATEs so each statement locks a limited key range.
+    """
+    min_id, max_id = connection.execute(select(func.min(column), func.max(column))).one()
+    if min_id is None:
+        return
+    for low in range(min_id, max_id + 1, chunk_size):
+        yield low, min(low + chunk_size - 1, max_id)
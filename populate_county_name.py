@@ -3,9 +3,14 @@
 import os
 import sys
 import logging
-from sqlalchemy import create_engine, MetaData, Table, Column, String, Boolean, select, update
+from sqlalchemy import Table, Column, String, Boolean, select, update, func
 from sqlalchemy.orm import sessionmaker  # Ensure this import is present
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, NoSuchTableError
+
+from column_transforms import register_transform
+from staging import staging_table, load_staging_rows
+from db import get_engine
+from schema import get_table, invalidate_tables
 
 def setup_logging():
     """
@@ -20,13 +25,12 @@ def setup_logging():
         ]
     )
 
-def create_db_engine(username, password, host, port, database):
+def create_db_engine(database):
     """
-    Creates and returns a SQLAlchemy engine.
+    Returns the shared SQLAlchemy engine for a logical database from config.py.
     """
     try:
-        db_url = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-        engine = create_engine(db_url, echo=False)
+        engine = get_engine(database)
         logging.info("Database engine created successfully.")
         return engine
     except Exception as e:
@@ -37,20 +41,19 @@ def add_county_name_column(engine, table_name):
     """
     Adds the 'county_name' column to the specified table if it does not exist.
     """
-    metadata = MetaData()
-    metadata.reflect(bind=engine)
-    
-    if table_name not in metadata.tables:
+    try:
+        table = get_table(engine, table_name)
+    except NoSuchTableError:
         logging.error(f"Table '{table_name}' does not exist in the database.")
         sys.exit(1)
     
-    table = metadata.tables[table_name]
-    
     if 'county_name' not in table.c:
         try:
             # Define the new column
             new_column = Column('county_name', String(255), nullable=True)
             new_column.create(table)
+            # Reflect the table again next time so the new column is picked up
+            invalidate_tables(engine, table_name)
             logging.info(f"Added 'county_name' column to '{table_name}' table.")
         except SQLAlchemyError as e:
             logging.error(f"Error adding 'county_name' column: {e}")
@@ -109,67 +112,77 @@ def define_location_to_county_mapping():
     }
     return location_to_county
 
+@register_transform('county', columns=['county_name'], reads=['location'])
+def county_transform(row):
+    """
+    Pipeline form of this script: looks up the county of the row's location.
+    """
+    county = LOCATION_TO_COUNTY.get((row['location'] or '').strip().lower())
+    return {'county_name': county} if county else {}
+
 def update_county_name(engine, table_name, mapping):
     """
     Updates the 'county_name' field in the specified table based on the location-to-county mapping.
+
+    The mapping is loaded into a temporary table keyed on the normalized
+    (trimmed, lowercased) location and applied with a single UPDATE ... JOIN,
+    so mixed-case or padded locations match too and the table is scanned once.
     """
-    metadata = MetaData()
-    metadata.reflect(bind=engine)
-    table = metadata.tables[table_name]
-    
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    
-    total_updated = 0
-    total_locations = len(mapping)
-    unmapped_locations = []
-    
+    table = get_table(engine, table_name)
+
+    mapping_rows = {}
     for location, county in mapping.items():
-        try:
-            # Perform a case-sensitive match on the 'location' field
-            stmt = (
-                update(table)
-                .where(table.c.location == location)
-                .values(county_name=county)
-            )
-            result = session.execute(stmt)
-            session.commit()
-            updated = result.rowcount
-            total_updated += updated
-            logging.info(f"Updated {updated} records for location '{location}' with county '{county}'.")
-        except SQLAlchemyError as e:
-            session.rollback()
-            logging.error(f"Error updating records for location '{location}': {e}")
-    
+        mapping_rows[location.strip().lower()] = {'location_key': location.strip().lower(), 'county_name': county}
+
+    try:
+        with engine.begin() as connection:
+            with staging_table(
+                connection, 'tmp_location_county',
+                Column('location_key', String(255), primary_key=True),
+                Column('county_name', String(255), nullable=False),
+            ) as staging:
+                load_staging_rows(connection, staging, list(mapping_rows.values()))
+
+                stmt = (
+                    update(table)
+                    .where(func.lower(func.trim(table.c.location)) == staging.c.location_key)
+                    .where(table.c.county_name.is_distinct_from(staging.c.county_name))
+                    .values(county_name=staging.c.county_name)
+                )
+                total_updated = connection.execute(stmt).rowcount
+        logging.info(f"Total records updated: {total_updated} using {len(mapping_rows)} mapped locations.")
+    except SQLAlchemyError as e:
+        logging.error(f"Error updating county names: {e}")
+        return
+
     # Identify locations not in the mapping
     try:
-        stmt_unmapped = select(table.c.location).where(table.c.county_name == None)
-        results_unmapped = session.execute(stmt_unmapped).fetchall()
-        for row in results_unmapped:
-            unmapped_locations.append(row['location'])
+        with engine.connect() as connection:
+            stmt_unmapped = (
+                select(table.c.location, func.count().label('records'))
+                .where(table.c.county_name == None)
+                .group_by(table.c.location)
+                .order_by(func.count().desc())
+            )
+            unmapped_locations = connection.execute(stmt_unmapped).fetchall()
         if unmapped_locations:
             logging.warning("The following locations were not mapped to any county:")
-            for loc in unmapped_locations:
-                logging.warning(f"- {loc}")
+            for location, records in unmapped_locations:
+                logging.warning(f"- {location} ({records} records)")
     except SQLAlchemyError as e:
         logging.error(f"Error fetching unmapped locations: {e}")
-    
-    logging.info(f"Total records updated: {total_updated} out of {total_locations} locations.")
-    session.close()
+
+LOCATION_TO_COUNTY = define_location_to_county_mapping()
 
 def main():
     setup_logging()
     
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'  # Replace with your actual database name
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
     TABLE_NAME = 'properties_new'  # Table to be altered
     
     # Create database engine
-    engine = create_db_engine(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
+    engine = create_db_engine(DB_NAME)
     
     # Check and add 'county_name' column if necessary
     add_county_name_column(engine, TABLE_NAME)
@@ -1,37 +1,44 @@
-from sqlalchemy import create_engine, MetaData, Table, select
-import pandas as pd
+from sqlalchemy import select
 
-# Database connection parameters
-DATABASE_URI = "mysql+pymysql://root:@localhost/archstone_clone"
+from db import get_engine
+from schema import get_table
 
-# Connect to the database
-engine = create_engine(DATABASE_URI)
-connection = engine.connect()
-metadata = MetaData()
+# Logical database from config.py
+DATABASE_NAME = 'archstone_clone'
 
-# Load the properties table
-properties_table = Table("properties", metadata, autoload_with=engine)
+def main():
+    import pandas as pd
 
-# Query to get all unique property categories and their corresponding property IDs
-query = select(
-    properties_table.c.id.label("id"),  # Use `id` as the primary key
-    properties_table.c.property_category.label("property_category")
-)
+    # Connect to the database
+    engine = get_engine(DATABASE_NAME)
+    connection = engine.connect()
 
-# Execute the query and fetch data into a DataFrame
-result = connection.execute(query)
-df_properties = pd.DataFrame(result.fetchall(), columns=["id", "property_category"])
+    # Load the properties table
+    properties_table = get_table(engine, "properties")
 
-# Assign unique IDs to each property category
-unique_categories = df_properties["property_category"].drop_duplicates().reset_index(drop=True)
-category_mapping = {category: idx + 1 for idx, category in enumerate(unique_categories)}
-df_properties["property_category_id"] = df_properties["property_category"].map(category_mapping)
+    # Query to get all unique property categories and their corresponding property IDs
+    query = select(
+        properties_table.c.id.label("id"),  # Use `id` as the primary key
+        properties_table.c.property_category.label("property_category")
+    )
 
-# Output CSV file with id and property_category_id
-output_csv_path = "property_id_category_mapping.csv"
-df_properties[["id", "property_category", "property_category_id"]].to_csv(output_csv_path, index=False)
+    # Execute the query and fetch data into a DataFrame
+    result = connection.execute(query)
+    df_properties = pd.DataFrame(result.fetchall(), columns=["id", "property_category"])
 
-# Close the database connection
-connection.close()
+    # Assign unique IDs to each property category
+    unique_categories = df_properties["property_category"].drop_duplicates().reset_index(drop=True)
+    category_mapping = {category: idx + 1 for idx, category in enumerate(unique_categories)}
+    df_properties["property_category_id"] = df_properties["property_category"].map(category_mapping)
 
-print(f"CSV file generated at: {output_csv_path}")
+    # Output CSV file with id and property_category_id
+    output_csv_path = "property_id_category_mapping.csv"
+    df_properties[["id", "property_category", "property_category_id"]].to_csv(output_csv_path, index=False)
+
+    # Close the database connection
+    connection.close()
+
+    print(f"CSV file generated at: {output_csv_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,19 @@
-from sqlalchemy import create_engine, MetaData, Table, update
+from sqlalchemy import update
 from sqlalchemy.exc import SQLAlchemyError
 
-def update_property_category():
-    # Database connection parameters
-    username = 'root'
-    password = ''  # No password
-    host = 'localhost'
-    port = 3306  # Default MySQL port
-    database = 'archstone_clone'  # <-- Replace with your actual database name
-
-    # Create the database URL
-    database_url = f'mysql+pymysql://{username}@{host}:{port}/{database}'
+from db import get_engine
+from schema import get_table
 
-    # Create an engine
-    engine = create_engine(database_url, echo=False)
+def update_property_category():
+    # Logical database from config.py
+    database = 'archstone_clone'
 
-    # Initialize metadata
-    metadata = MetaData()
+    # Get the shared engine
+    engine = get_engine(database)
 
     try:
         # Reflect the 'properties' table from the database
-        properties = Table('properties', metadata, autoload_with=engine)
+        properties = get_table(engine, 'properties')
 
         # Create the update statement
         stmt = (
@@ -40,5 +33,8 @@ def update_property_category():
         print("An error occurred while updating the 'property_category' fields:")
         print(e)
 
-if __name__ == "__main__":
+def main():
     update_property_category()
+
+if __name__ == "__main__":
+    main()
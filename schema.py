@@ -0,0 +1,229 @@
+# schema.py
+
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+import sqlalchemy
+from sqlalchemy import MetaData, text
+from sqlalchemy.exc import NoSuchTableError
+
+import config
+
+# Tables whose reflected definitions are kept in the on-disk cache
+CACHED_TABLES = (
+    'properties_new',
+    'property',
+    'property_images',
+    'properties',
+    'locations',
+    'property_categories',
+)
+
+# str(engine.url) -> MetaData holding the tables reflected so far in this process
+_metadata = {}
+
+# str(engine.url) -> {table name: fingerprint} of CACHED_TABLES, computed once per process
+_fingerprints = {}
+
+# MySQL: column and index definitions plus CREATE_TIME. UPDATE_TIME is left out
+# on purpose: it moves on every data write, not only on DDL.
+_MYSQL_FINGERPRINT_QUERIES = (
+    "SELECT TABLE_NAME, CREATE_TIME FROM information_schema.TABLES "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :names",
+    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA "
+    "FROM information_schema.COLUMNS "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :names ORDER BY TABLE_NAME, ORDINAL_POSITION",
+    "SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME "
+    "FROM information_schema.STATISTICS "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :names ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX",
+)
+
+# SQLite (used for local benchmarks): the stored CREATE statements are the schema
+_SQLITE_FINGERPRINT_QUERIES = (
+    "SELECT tbl_name, type, name, sql FROM sqlite_master "
+    "WHERE tbl_name IN :names ORDER BY tbl_name, type, name",
+)
+
+def get_metadata(engine):
+    """
+    Returns the process-wide MetaData cached for an engine's database.
+    """
+    key = str(engine.url)
+    if key not in _metadata:
+        _metadata[key] = MetaData()
+    return _metadata[key]
+
+def schema_fingerprint(connection, table_names):
+    """
+    Computes a cheap per-table fingerprint of the schema from the data dictionary.
+
+    Any DDL that changes a table's columns or indexes (or recreates it) changes
+    its fingerprint. Tables that do not exist get no entry.
+
+    Returns:
+        dict: {table name: hex digest}
+    """
+    if connection.dialect.name == 'sqlite':
+        queries = _SQLITE_FINGERPRINT_QUERIES
+    else:
+        queries = _MYSQL_FINGERPRINT_QUERIES
+
+    digests = {}
+    for query in queries:
+        stmt = text(query).bindparams(sqlalchemy.bindparam('names', expanding=True))
+        for row in connection.execute(stmt, {'names': list(table_names)}):
+            table_name, *values = row
+            digest = digests.setdefault(table_name, hashlib.sha256())
+            digest.update(repr(values).encode('utf-8'))
+    return {table_name: digest.hexdigest() for table_name, digest in digests.items()}
+
+def _cache_path(engine):
+    database = os.path.basename(str(engine.url.database or 'default'))
+    url_hash = hashlib.sha1(str(engine.url).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(config.SCHEMA_CACHE_DIR, f"{database}-{url_hash}.pickle")
+
+def _current_fingerprints(engine):
+    key = str(engine.url)
+    if key not in _fingerprints:
+        with engine.connect() as connection:
+            _fingerprints[key] = schema_fingerprint(connection, CACHED_TABLES)
+    return _fingerprints[key]
+
+def _read_cache(path):
+    """
+    Returns the contents of a cache file, or None if it is missing, unreadable
+    or written by another SQLAlchemy version.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as cache_file:
+            cached = pickle.load(cache_file)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable schema cache '{path}': {e}")
+        return None
+    if cached.get('sqlalchemy_version') != sqlalchemy.__version__:
+        return None
+    return cached
+
+def load_cached_tables(engine, table_names):
+    """
+    Copies tables from the on-disk cache into the process metadata when their
+    stored fingerprint still matches the database.
+
+    Returns:
+        list: The names of the tables loaded from the cache.
+    """
+    cached = _read_cache(_cache_path(engine))
+    if cached is None:
+        return []
+
+    fingerprints = _current_fingerprints(engine)
+    metadata = get_metadata(engine)
+    loaded = []
+    for name in table_names:
+        table = cached['metadata'].tables.get(name)
+        if table is None or cached['fingerprints'].get(name) != fingerprints.get(name):
+            continue
+        table.to_metadata(metadata)
+        loaded.append(name)
+    return loaded
+
+def save_cached_tables(engine):
+    """
+    Writes the process's reflected CACHED_TABLES and their fingerprints to the
+    on-disk cache, replacing the previous file atomically.
+
+    Entries already in the file for tables this process did not reflect are
+    kept while their fingerprint still matches, so jobs using different
+    tables do not evict each other's definitions.
+    """
+    fingerprints = _current_fingerprints(engine)
+    source = get_metadata(engine)
+    path = _cache_path(engine)
+    metadata = MetaData()
+    for name in CACHED_TABLES:
+        if name in source.tables and name in fingerprints:
+            source.tables[name].to_metadata(metadata)
+
+    cached = _read_cache(path)
+    if cached is not None:
+        for name, table in cached['metadata'].tables.items():
+            if (name not in metadata.tables and name in CACHED_TABLES
+                    and cached['fingerprints'].get(name) == fingerprints.get(name)):
+                table.to_metadata(metadata)
+
+    os.makedirs(config.SCHEMA_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=config.SCHEMA_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as cache_file:
+            pickle.dump({
+                'sqlalchemy_version': sqlalchemy.__version__,
+                'fingerprints': {name: fingerprints[name] for name in metadata.tables},
+                'metadata': metadata,
+            }, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+def reflect_tables(engine, table_names):
+    """
+    Returns reflected Table objects for the named tables, reflecting only the
+    ones not already cached instead of the whole schema.
+
+    CACHED_TABLES are first looked up in the on-disk cache (config.SCHEMA_CACHE_DIR);
+    a table is only reflected from the database when it is not cached or its
+    schema fingerprint has changed since, and the cache is then rewritten.
+    Foreign keys are not followed, so referenced tables are only reflected
+    when they are asked for themselves.
+
+    Args:
+        engine (Engine): The engine whose database holds the tables.
+        table_names (list): The table names to return.
+
+    Returns:
+        list: The Table objects, in the order requested.
+
+    Raises:
+        NoSuchTableError: If any table does not exist; the message names them all.
+    """
+    metadata = get_metadata(engine)
+    missing = [name for name in table_names if name not in metadata.tables]
+
+    use_cache = config.SCHEMA_CACHE_DIR is not None and any(name in CACHED_TABLES for name in missing)
+    if use_cache:
+        loaded = load_cached_tables(engine, [name for name in missing if name in CACHED_TABLES])
+        missing = [name for name in missing if name not in loaded]
+
+    if missing:
+        metadata.reflect(bind=engine, only=lambda name, _: name in missing, resolve_fks=False)
+        not_found = [name for name in missing if name not in metadata.tables]
+        if not_found:
+            raise NoSuchTableError(', '.join(not_found))
+        if use_cache and any(name in CACHED_TABLES for name in missing):
+            try:
+                save_cached_tables(engine)
+            except Exception as e:
+                logging.warning(f"Could not write schema cache: {e}")
+    return [metadata.tables[name] for name in table_names]
+
+def get_table(engine, table_name):
+    """
+    Returns one reflected Table; see reflect_tables().
+    """
+    table, = reflect_tables(engine, [table_name])
+    return table
+
+def invalidate_tables(engine, *table_names):
+    """
+    Drops cached tables so the next request reflects them again, e.g. after an ALTER TABLE.
+    """
+    metadata = get_metadata(engine)
+    for name in table_names:
+        if name in metadata.tables:
+            metadata.remove(metadata.tables[name])
+    # The DDL changed the fingerprints too
+    _fingerprints.pop(str(engine.url), None)
@@ -78,8 +78,7 @@ def save_keywords_to_csv(keywords, filename="keywords.csv"):
     except Exception as e:
         print(f"Error saving keywords to CSV: {e}")
 
-# Example usage
-if __name__ == "__main__":
+def main():
     base_url = input("Enter a real estate website URL: ")
     all_links = get_all_links(base_url)
 
@@ -93,3 +92,7 @@ if __name__ == "__main__":
 
     # Save the aggregated keywords to a CSV file
     save_keywords_to_csv(all_keywords.most_common())
+
+# Example usage
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# sql_metrics.py
+#
+# Opt-in SQL instrumentation for engines created by db.get_engine(). Enable it
+# with config.SQL_METRICS['format'] ('summary' or 'jsonl') or
+# `python -m dbops --sql-metrics summary <task>`; the report is written when
+# the process exits.
+
+import re
+import sys
+import json
+import time
+import atexit
+import threading
+from sqlalchemy import event
+
+# Statements of one shape run this many times one by one (not as executemany)
+# are flagged in the report as a likely per-row loop
+ROW_LOOP_THRESHOLD = 100
+
+_LITERAL_PATTERNS = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),                        # String literals
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])"), '?'),          # Numeric literals
+    (re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\?|__\[POSTCOMPILE_\w+\]"), '?'),  # Bind placeholders
+]
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_VALUES = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+
+def normalize_statement(statement):
+    """
+    Reduces a SQL statement to its shape: literals and bind parameters become
+    '?', and IN lists or multi-row VALUES collapse to '(...)'.
+    """
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    for pattern, replacement in _LITERAL_PATTERNS:
+        shape = pattern.sub(replacement, shape)
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    return _REPEATED_VALUES.sub(r'\1', shape)
+
+class _Timing:
+    """
+    Count, total and maximum of a set of durations, in seconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+class SqlMetrics:
+    """
+    Collects per-statement-shape counts, affected rows and time, commit latency
+    and pool checkout waits for every engine passed to attach().
+
+    Affected rows are the driver's rowcount for statements that return no
+    result set (INSERT, UPDATE, DELETE, LOAD DATA). Rows read by SELECTs are not
+    counted: drivers report -1 or a partial count before the rows are fetched.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statements = {}   # shape -> {'timing': _Timing, 'executemany': int, 'affected_rows': int}
+        self.commits = _Timing()
+        self.checkouts = _Timing()
+        self.new_connections = 0
+
+    def attach(self, engine):
+        """
+        Hooks the engine's cursor execution, commits and connection checkouts.
+        """
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine.pool, 'connect', self._on_connect)
+
+        # Core has no "after commit" event, so time the dialect's DBAPI commit call
+        do_commit = engine.dialect.do_commit
+        def timed_commit(dbapi_connection):
+            start = time.perf_counter()
+            try:
+                return do_commit(dbapi_connection)
+            finally:
+                with self.lock:
+                    self.commits.add(time.perf_counter() - start)
+        engine.dialect.do_commit = timed_commit
+
+        # Connection checkout, including any wait for a free pooled connection
+        raw_connection = engine.raw_connection
+        def timed_raw_connection():
+            start = time.perf_counter()
+            try:
+                return raw_connection()
+            finally:
+                with self.lock:
+                    self.checkouts.add(time.perf_counter() - start)
+        engine.raw_connection = timed_raw_connection
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_metrics_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['sql_metrics_start'].pop()
+        shape = normalize_statement(statement)
+        # Only writes: a SELECT's rowcount is -1 or counts rows not yet fetched
+        rowcount = getattr(cursor, 'rowcount', -1) if cursor.description is None else -1
+        with self.lock:
+            entry = self.statements.get(shape)
+            if entry is None:
+                entry = self.statements[shape] = {'timing': _Timing(), 'executemany': 0, 'affected_rows': 0}
+            entry['timing'].add(elapsed)
+            if executemany:
+                entry['executemany'] += 1
+            if rowcount is not None and rowcount > 0:
+                entry['affected_rows'] += rowcount
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.new_connections += 1
+
+    def ranked_statements(self):
+        """
+        Returns one dict per statement shape, slowest total time first.
+        """
+        ranked = []
+        for shape, entry in self.statements.items():
+            timing = entry['timing']
+            ranked.append({
+                'shape': shape,
+                **timing.as_dict(),
+                'executemany': entry['executemany'],
+                'affected_rows': entry['affected_rows'],
+                'row_loop': timing.count >= ROW_LOOP_THRESHOLD and not entry['executemany'],
+            })
+        return sorted(ranked, key=lambda item: item['total_ms'], reverse=True)
+
+    def report_lines(self, output_format='summary', limit=20):
+        """
+        Returns the report as text lines ('summary') or JSON lines ('jsonl').
+        """
+        statements = self.ranked_statements()
+        commits = self.commits.as_dict()
+        checkouts = {**self.checkouts.as_dict(), 'new_connections': self.new_connections}
+        if output_format == 'jsonl':
+            lines = [json.dumps({'type': 'statement', **item}) for item in statements]
+            lines.append(json.dumps({'type': 'commit', **commits}))
+            lines.append(json.dumps({'type': 'checkout', **checkouts}))
+            return lines
+
+        total_ms = sum(item['total_ms'] for item in statements)
+        lines = [f"SQL metrics: {sum(item['count'] for item in statements)} statements, "
+                 f"{len(statements)} shapes, {total_ms:.1f} ms in the database driver."]
+        lines.append(f"{'count':>8} {'total ms':>10} {'mean ms':>9} {'affected':>9}  shape")
+        for item in statements[:limit]:
+            marker = '  <- per-row loop?' if item['row_loop'] else ''
+            lines.append(f"{item['count']:>8} {item['total_ms']:>10.1f} {item['mean_ms']:>9.3f} {item['affected_rows']:>9}  "
+                         f"{item['shape'][:160]}{marker}")
+        if len(statements) > limit:
+            lines.append(f"... {len(statements) - limit} more shapes")
+        lines.append(f"Commits: {commits['count']}, total {commits['total_ms']:.1f} ms, max {commits['max_ms']:.1f} ms.")
+        lines.append(f"Connection checkouts: {checkouts['count']}, total wait {checkouts['total_ms']:.1f} ms, "
+                     f"max {checkouts['max_ms']:.1f} ms, {checkouts['new_connections']} new connections.")
+        return lines
+
+    def write_report(self, output_format='summary', output=None):
+        """
+        Writes the report to a file (appending) or to stderr.
+        """
+        if not self.statements and not self.checkouts.count:
+            return
+        lines = self.report_lines(output_format)
+        if output:
+            with open(output, 'a', encoding='utf-8') as report_file:
+                report_file.write('\n'.join(lines) + '\n')
+        else:
+            print('\n'.join(lines), file=sys.stderr)
+
+# The process-wide collector, created on first use
+_metrics = None
+
+def instrument(engine, output_format='summary', output=None):
+    """
+    Attaches the process-wide collector to an engine; the first call also
+    registers the report to be written at exit.
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = SqlMetrics()
+        atexit.register(_metrics.write_report, output_format, output)
+    _metrics.attach(engine)
+    return _metrics
+
+def get_metrics():
+    """
+    Returns the process-wide collector, or None if no engine is instrumented.
+    """
+    return _metrics
@@ -0,0 +1,76 @@
+# staging.py
+
+import logging
+from contextlib import contextmanager
+from sqlalchemy import MetaData, Table, insert
+
+def create_staging_table(connection, name, *columns):
+    """
+    Creates a TEMPORARY table on the given connection.
+
+    Temporary tables are private to the connection that created them and
+    disappear when it closes, so the staging table, the rows loaded into it
+    and the UPDATE ... JOIN that reads it must all use the same connection.
+    A table of the same name left on a pooled connection by an earlier failed
+    run is dropped first. Prefer staging_table(), which also drops the table
+    when the work fails.
+
+    Args:
+        connection (Connection): The connection to create the table on.
+        name (str): The table name.
+        *columns (Column): Column definitions; give it a primary key so the join is indexed.
+
+    Returns:
+        Table: The staging table.
+    """
+    table = Table(name, MetaData(), *columns, prefixes=['TEMPORARY'])
+    drop_staging_table(connection, table)
+    table.create(connection)
+    return table
+
+def load_staging_rows(connection, table, rows, batch_size=5000):
+    """
+    Loads row dicts into a staging table with one executemany per batch.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    stmt = insert(table)
+    for i in range(0, len(rows), batch_size):
+        connection.execute(stmt, rows[i:i + batch_size])
+    logging.info(f"Loaded {len(rows)} rows into staging table '{table.name}'.")
+    return len(rows)
+
+def drop_staging_table(connection, table):
+    """
+    Drops a staging table, if it exists, before its connection goes back to the pool.
+
+    On MySQL this is DROP TEMPORARY TABLE: a plain DROP TABLE would implicitly
+    commit the open transaction.
+    """
+    if connection.dialect.name in ('mysql', 'mariadb'):
+        quoted = connection.dialect.identifier_preparer.format_table(table)
+        connection.exec_driver_sql(f"DROP TEMPORARY TABLE IF EXISTS {quoted}")
+    else:
+        table.drop(connection, checkfirst=True)
+
+@contextmanager
+def staging_table(connection, name, *columns):
+    """
+    Creates a staging table (see create_staging_table()) and always drops it
+    on exit, also when the work inside fails.
+
+    A MySQL temporary table survives a rollback, so without the drop it would
+    stay on the pooled connection and the next create would fail with "table
+    already exists". If the drop itself fails the connection is invalidated,
+    which discards it (and the table) instead of returning it to the pool.
+    """
+    table = create_staging_table(connection, name, *columns)
+    try:
+        yield table
+    finally:
+        try:
+            drop_staging_table(connection, table)
+        except Exception as e:
+            logging.warning(f"Could not drop staging table '{name}' ({e}); discarding the connection.")
+            connection.invalidate()
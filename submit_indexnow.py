@@ -9,12 +9,13 @@ import http.client as http_client
 # Enable Debug Logs
 # =======================
 
-http_client.HTTPConnection.debuglevel = 1
-logging.basicConfig()
-logging.getLogger().setLevel(logging.DEBUG)
-requests_log = logging.getLogger("requests.packages.urllib3")
-requests_log.setLevel(logging.DEBUG)
-requests_log.propagate = True
+def enable_debug_logging():
+    http_client.HTTPConnection.debuglevel = 1
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.DEBUG)
+    requests_log = logging.getLogger("requests.packages.urllib3")
+    requests_log.setLevel(logging.DEBUG)
+    requests_log.propagate = True
 
 # =======================
 # Configuration Section
@@ -83,6 +84,7 @@ def submit_to_indexnow(host, key, urls, batch_size=10000):
             continue
 
 def main():
+    enable_debug_logging()
     print("🔄 Starting IndexNow URL submission process...")
     urls = fetch_sitemap(SITEMAP_URL)
     if not urls:
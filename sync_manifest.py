@@ -0,0 +1,91 @@
+# sync_manifest.py
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+MANIFEST_VERSION = 1
+
+# Bytes read per hashing step
+_HASH_CHUNK = 1 << 20
+
+def load_manifest(path, source_dir):
+    """
+    Loads a sync manifest written by save_manifest().
+
+    A missing or unreadable manifest, or one recorded for a different source
+    directory, yields an empty one, so the next run simply copies everything.
+
+    Args:
+        path (str): The manifest file.
+        source_dir (str): The source directory of this run.
+
+    Returns:
+        dict: Destination path (relative to the destination directory) ->
+              {'size': ..., 'mtime_ns': ..., 'sha256': ... or None}.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable manifest '{path}': {e}")
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        logging.warning(f"Ignoring manifest '{path}' written by another version.")
+        return {}
+    if manifest.get('source_dir') != os.path.abspath(source_dir):
+        logging.warning(f"Ignoring manifest '{path}': it was recorded for source '{manifest.get('source_dir')}'.")
+        return {}
+    return manifest.get('files', {})
+
+def save_manifest(path, source_dir, files):
+    """
+    Writes the manifest, replacing the previous file atomically.
+
+    Args:
+        path (str): The manifest file.
+        source_dir (str): The source directory the entries were synced from.
+        files (dict): Entries as returned by load_manifest().
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as manifest_file:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'source_dir': os.path.abspath(source_dir),
+                'files': files,
+            }, manifest_file, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+def file_digest(path):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def manifest_entry(info, sha256=None):
+    """
+    Builds a manifest entry from a source file's fs_index.FileInfo.
+    """
+    return {'size': info.size, 'mtime_ns': info.mtime_ns, 'sha256': sha256}
+
+def is_unchanged(entry, info):
+    """
+    Returns True if a manifest entry matches the source file's size and mtime.
+    """
+    return (entry is not None
+            and entry.get('size') == info.size
+            and entry.get('mtime_ns') == info.mtime_ns)
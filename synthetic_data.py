@@ -0,0 +1,168 @@
+# synthetic_data.py
+#
+# Generates a legacy 'property' table of N rows with the same kind of messy
+# Price/rooms/Category/image values as production, plus empty
+# 'properties_new' and 'property_images' tables, for benchmark.py or local runs.
+# The job checkpoint table is emptied too, so no job resumes from an earlier dataset.
+
+import sys
+import random
+import argparse
+import logging
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, DateTime, insert
+
+from create_properties_new import Base
+from checkpoints import checkpoints_table
+from image_paths import IMAGE_COLUMNS
+from populate_county_name import LOCATION_TO_COUNTY
+
+# Legacy 'property' columns; the old table stored everything as text
+LEGACY_TEXT_COLUMNS = ['Description', 'rooms', 'location', 'Price', 'Category', 'propertytype', 'Product'] + IMAGE_COLUMNS
+
+# Value pools, with the spellings, units and blanks found in the legacy data
+PRICES = [
+    'Ksh 25,000,000', 'KES 12,500,000', 'Kshs. 85,000', '2.5M', '3.2m', '18 million', '45k', 'Ksh 120k',
+    '120', '75', 'USD 3,000', '$1,500', '1.2 Billion', 'Price on request', '', None,
+]
+ROOMS = [
+    '4 bedrooms', '3 Bedroom', '2br', '5 Bedrooms en-suite', 'three', 'Four bedrooms', 'twenty one',
+    'Studio', 'bedsitter', '1', '6', '', None,
+]
+CATEGORIES = ['For Sale', 'for sale', 'Sale', 'FOR SALE ', 'For Rent', 'rent', 'Rentals', 'To Let', 'Lease', 'Auction', '', None]
+PROPERTY_TYPES = ['House', 'Apartment', 'apartment', 'Townhouse', 'Villa', 'Plot', 'Land', 'Commercial', 'Office', '', None]
+UNKNOWN_LOCATIONS = ['Somewhere Else', 'Unknown', 'N/A', '']
+
+def setup_logging():
+    """
+    Configures logging to log messages to the console.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+def define_tables(metadata):
+    """
+    Adds the legacy 'property' and the 'property_images' tables to a MetaData.
+
+    'properties_new' comes from create_properties_new.Base.
+    """
+    legacy = Table(
+        'property', metadata,
+        Column('ID', Integer, primary_key=True),
+        *[Column(name, Text) for name in LEGACY_TEXT_COLUMNS],
+    )
+    images = Table(
+        'property_images', metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('property_id', Integer, nullable=False, index=True),
+        Column('image_path', String(512), nullable=False),
+        Column('created_at', DateTime),
+        Column('updated_at', DateTime),
+    )
+    return legacy, images
+
+def messy_location(rng, locations):
+    """
+    Picks a location, sometimes with the casing and padding mistakes of the legacy data.
+    """
+    if rng.random() < 0.05:
+        return rng.choice(UNKNOWN_LOCATIONS)
+    location = rng.choice(locations)
+    variant = rng.random()
+    if variant < 0.2:
+        return location.lower()
+    if variant < 0.3:
+        return f" {location.upper()} "
+    return location.title()
+
+def generate_rows(count, seed=42, start_id=1):
+    """
+    Yields legacy 'property' rows; the same seed always gives the same data.
+    """
+    rng = random.Random(seed)
+    locations = sorted(LOCATION_TO_COUNTY)
+    for offset in range(count):
+        property_id = start_id + offset
+        row = {
+            'ID': property_id,
+            'Description': f"Listing {property_id}: " + rng.choice(['Spacious', 'Modern', 'Cozy', 'Secure']) + " home.",
+            'rooms': rng.choice(ROOMS),
+            'location': messy_location(rng, locations),
+            'Price': rng.choice(PRICES),
+            'Category': rng.choice(CATEGORIES),
+            'propertytype': rng.choice(PROPERTY_TYPES),
+            'Product': rng.choice(['', None, f"Plot {property_id}", 'Off Ngong Road']),
+        }
+        image_count = rng.randint(0, len(IMAGE_COLUMNS))
+        for idx, column in enumerate(IMAGE_COLUMNS):
+            if idx < image_count:
+                row[column] = f"https://archstonekenya.com/images/{property_id}/{column.lower()}_{idx}.webp"
+            else:
+                row[column] = rng.choice([None, '', ' '])
+        yield row
+
+def create_dataset(database_url, rows, seed=42, batch_size=5000):
+    """
+    Drops and recreates the benchmark tables and fills 'property' with synthetic rows.
+
+    'migration_checkpoints' is recreated empty as well; a high-water mark left
+    by an earlier run would make update_price.py skip the new rows.
+
+    Args:
+        database_url (str): SQLAlchemy URL of a scratch database (SQLite file or local MySQL).
+        rows (int): The number of legacy rows to generate.
+        seed (int): Random seed, so runs across commits use identical data.
+        batch_size (int): Rows per executemany INSERT.
+    """
+    engine = create_engine(database_url)
+    metadata = MetaData()
+    legacy, images = define_tables(metadata)
+    properties_new = Base.metadata.tables['properties_new'].to_metadata(metadata)
+    checkpoints_table.to_metadata(metadata)
+    try:
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        with engine.begin() as connection:
+            if connection.dialect.name == 'sqlite':
+                # Lets a job stream one table while writing another
+                connection.exec_driver_sql('PRAGMA journal_mode=WAL')
+        stmt = insert(legacy)
+        batch = []
+        with engine.begin() as connection:
+            for row in generate_rows(rows, seed=seed):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    connection.execute(stmt, batch)
+                    batch = []
+            if batch:
+                connection.execute(stmt, batch)
+        logging.info(f"Generated {rows} legacy rows in '{legacy.name}' (seed {seed}); "
+                     f"'{properties_new.name}' and '{images.name}' are empty.")
+    finally:
+        engine.dispose()
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the generator.
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic legacy 'property' table.")
+    parser.add_argument('--url', default='sqlite:///benchmark.db',
+                        help="SQLAlchemy URL of the scratch database; ALL ITS BENCHMARK TABLES ARE DROPPED "
+                             "(default: sqlite:///benchmark.db).")
+    parser.add_argument('--rows', type=int, default=10000, help="Number of legacy rows (default: 10000).")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    try:
+        create_dataset(args.url, args.rows, seed=args.seed)
+    except Exception as e:
+        logging.error(f"Error generating synthetic data: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
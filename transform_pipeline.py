@@ -0,0 +1,183 @@
+# transform_pipeline.py
+#
+# Runs the post-migration column transforms of update_bedrooms.py,
+# update_price.py, update_currency.py, update_property_type.py and
+# populate_county_name.py in a single pass over 'properties_new', issuing at
+# most one UPDATE per changed row.
+
+import sys
+import argparse
+import logging
+from datetime import datetime
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import sessionmaker
+
+from column_transforms import load_transforms
+from checkpoints import ensure_checkpoint_table, load_checkpoint, save_checkpoint
+from db import get_engine
+from schema import get_table
+
+# Define table names
+TABLE_NAME = 'properties_new'    # Table to update
+LEGACY_TABLE_NAME = 'property'   # Legacy table, joined on ID for transforms that need it
+
+def apply_transforms(transforms, row):
+    """
+    Runs the transforms over one row and returns only the values that changed.
+    """
+    current = dict(row)
+    for transform in transforms:
+        current.update(transform.func(current))
+    changes = {}
+    for transform in transforms:
+        for column in transform.columns:
+            if current[column] != row[column]:
+                changes[column] = current[column]
+    return changes
+
+def write_changes(session, table, changed_rows):
+    """
+    Writes changed rows with one executemany UPDATE per distinct set of changed columns.
+    """
+    groups = {}
+    for row_id, changes in changed_rows:
+        groups.setdefault(tuple(sorted(changes)), []).append({'_id': row_id, **changes})
+    for columns, params in groups.items():
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('_id'))
+            .values({**{column: bindparam(column) for column in columns}, 'updated_at': datetime.now()})
+        )
+        session.execute(stmt, params)
+
+def run_pipeline(engine, transforms, chunk_size=1000):
+    """
+    Streams 'properties_new' once (joined to the legacy table when needed),
+    applies every transform to each row and writes one UPDATE per changed row.
+
+    Transforms with a checkpoint skip the rows their standalone script (or an
+    earlier pipeline run) already processed, and their checkpoint is advanced
+    in the same transaction as each chunk's updates.
+
+    Returns:
+        dict: Counters for 'scanned' and 'updated' rows, plus one per transform name.
+    """
+    needs_legacy = any(transform.legacy_columns for transform in transforms)
+    table = get_table(engine, TABLE_NAME)
+
+    column_names = [column for transform in transforms for column in transform.columns + transform.reads]
+    missing = [column for column in column_names if column not in table.c]
+    if missing:
+        raise RuntimeError(f"Columns missing from '{TABLE_NAME}': {', '.join(missing)}. "
+                           "Run populate_county_name.py once to add 'county_name'.")
+
+    stmt = select(*dict.fromkeys([table.c.id] + [table.c[column] for column in column_names]))
+    if needs_legacy:
+        legacy = get_table(engine, LEGACY_TABLE_NAME)
+        legacy_columns = {column for transform in transforms for column in transform.legacy_columns}
+        stmt = stmt.add_columns(*[legacy.c[column] for column in sorted(legacy_columns)])
+        stmt = stmt.select_from(table.outerjoin(legacy, legacy.c.ID == table.c.id))
+    stmt = stmt.order_by(table.c.id).execution_options(stream_results=True, yield_per=chunk_size)
+
+    # Highest ID already processed, per checkpointed transform
+    done_through = {}
+    checkpointed = [transform for transform in transforms if transform.checkpoint]
+    if checkpointed:
+        ensure_checkpoint_table(engine)
+        with engine.connect() as connection:
+            for transform in checkpointed:
+                done_through[transform.name] = load_checkpoint(connection, transform.checkpoint)
+                if done_through[transform.name] is not None:
+                    logging.info(f"Transform '{transform.name}' already applied up to ID {done_through[transform.name]}.")
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    counts = {'scanned': 0, 'updated': 0}
+    counts.update({transform.name: 0 for transform in transforms})
+
+    # The scan runs on its own connection so the updates can be committed per chunk
+    with engine.connect() as read_connection:
+        try:
+            for chunk in read_connection.execute(stmt).mappings().partitions(chunk_size):
+                changed_rows = []
+                for row in chunk:
+                    active = [transform for transform in transforms
+                              if done_through.get(transform.name) is None or row['id'] > done_through[transform.name]]
+                    changes = apply_transforms(active, row)
+                    if changes:
+                        changed_rows.append((row['id'], changes))
+                        for transform in transforms:
+                            if any(column in changes for column in transform.columns):
+                                counts[transform.name] += 1
+                counts['scanned'] += len(chunk)
+                if changed_rows:
+                    write_changes(session, table, changed_rows)
+                    counts['updated'] += len(changed_rows)
+                for transform in checkpointed:
+                    save_checkpoint(session, transform.checkpoint, chunk[-1]['id'])
+                    done_through[transform.name] = chunk[-1]['id']
+                if changed_rows or checkpointed:
+                    session.commit()
+                logging.info(f"Scanned {counts['scanned']} records, updated {counts['updated']}.")
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    return counts
+
+def setup_logging():
+    """
+    Configures logging to log messages to a file and the console.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.FileHandler("transform_pipeline.log"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the pipeline runner.
+    """
+    parser = argparse.ArgumentParser(description=f"Apply the post-migration column transforms to '{TABLE_NAME}' in one pass.")
+    parser.add_argument('--only', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        help="Comma-separated transform names to run (default: all, in pipeline order).")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Rows read and committed per chunk (default: 1000).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Setup logging
+    setup_logging()
+
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
+
+    # Get the shared SQLAlchemy engine
+    try:
+        engine = get_engine(DB_NAME)
+        logging.info("Database engine created successfully.")
+    except Exception as e:
+        logging.error(f"Error creating engine: {e}")
+        sys.exit(1)
+
+    try:
+        transforms = load_transforms(args.only)
+        logging.info(f"Running transforms: {', '.join(transform.name for transform in transforms)}")
+        counts = run_pipeline(engine, transforms, chunk_size=args.chunk_size)
+    except Exception as e:
+        logging.error(f"Transform pipeline failed: {e}")
+        sys.exit(1)
+
+    for transform in transforms:
+        logging.info(f"Transform '{transform.name}' changed {counts[transform.name]} records.")
+    logging.info(f"Transform pipeline completed successfully. Scanned {counts['scanned']} records, updated {counts['updated']}.")
+
+if __name__ == "__main__":
+    main()
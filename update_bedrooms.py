@@ -1,18 +1,19 @@
 # update_bedrooms.py
 
 import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select, update
+from sqlalchemy import Table, Column, Integer, select, update
+from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import sys
+import argparse
 import logging
-import re
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from parsing import extract_numeric_rooms, parse_rooms_column
+from column_transforms import register_transform
+from staging import staging_table, load_staging_rows
+from db import get_engine
+from schema import reflect_tables
 
 def setup_logging():
     """
@@ -27,146 +28,91 @@ def setup_logging():
         ]
     )
 
-def word_to_num(word):
+@register_transform('bedrooms', columns=['bedrooms'], legacy_columns=['ID', 'rooms', 'propertytype'])
+def bedrooms_transform(row):
     """
-    Converts a word representation of a number to its integer equivalent.
+    Pipeline form of this script: bedrooms parsed from the legacy rooms string.
+    Rows without a legacy counterpart are left alone.
+    """
+    if row['ID'] is None:
+        return {}
+    return {'bedrooms': extract_numeric_rooms(row['rooms'], row['propertytype'])}
 
-    Args:
-        word (str): The word representing the number (e.g., 'four').
+def apply_bedrooms_via_staging(engine, new_table, records, bedrooms_column):
+    """
+    Loads (id, bedrooms) pairs into a temporary staging table and applies them
+    with a single UPDATE ... JOIN that only touches rows whose value differs.
 
     Returns:
-        int or None: The integer equivalent, or None if the word is not a valid number.
+        int: The number of rows changed.
     """
-    word = word.lower()
-    numbers = {
-        'zero': 0,
-        'one': 1,
-        'two': 2,
-        'three':3,
-        'four':4,
-        'five':5,
-        'six':6,
-        'seven':7,
-        'eight':8,
-        'nine':9,
-        'ten':10,
-        'eleven':11,
-        'twelve':12,
-        'thirteen':13,
-        'fourteen':14,
-        'fifteen':15,
-        'sixteen':16,
-        'seventeen':17,
-        'eighteen':18,
-        'nineteen':19,
-        'twenty':20,
-        'thirty':30,
-        'forty':40,
-        'fifty':50,
-        'sixty':60,
-        'seventy':70,
-        'eighty':80,
-        'ninety':90
-        # Extend this dictionary as needed
-    }
-    return numbers.get(word, None)
-
-def extract_numeric_rooms(rooms_str, propertytype):
-    """
-    Extracts the numeric value from the rooms string.
-    Converts word numbers to integers and ignores properties of type 'Plot'.
-
-    Args:
-        rooms_str (str): The raw rooms string from the old table.
-        propertytype (str): The property type to check for exclusion.
+    pairs = [{'id': record['ID'], 'bedrooms': bedrooms} for record, bedrooms in zip(records, bedrooms_column)]
+    with engine.begin() as connection:
+        with staging_table(
+            connection, 'tmp_bedrooms',
+            Column('id', Integer, primary_key=True),
+            Column('bedrooms', Integer, nullable=True),
+        ) as staging:
+            load_staging_rows(connection, staging, pairs)
+            update_stmt = (
+                update(new_table)
+                .where(new_table.c.id == staging.c.id)
+                .where(new_table.c.bedrooms.is_distinct_from(staging.c.bedrooms))
+                .values(bedrooms=staging.c.bedrooms, updated_at=datetime.now())
+            )
+            result = connection.execute(update_stmt)
+    return result.rowcount
 
-    Returns:
-        int or None: The extracted numeric bedrooms, or None if extraction fails or propertytype is 'Plot'.
+def parse_args(argv=None):
+    """
+    Parses command-line options for the bedrooms backfill.
     """
-    if not rooms_str:
-        return None
+    parser = argparse.ArgumentParser(description="Backfill properties_new.bedrooms from the legacy rooms column.")
+    parser.add_argument('--staging', action='store_true',
+                        help="Load all (id, bedrooms) pairs into a temporary table and apply them with one "
+                             "UPDATE ... JOIN, skipping rows whose value is unchanged.")
+    return parser.parse_args(argv)
 
-    # Exclude properties of type 'Plot'
-    if propertytype.lower() == 'plot':
-        return None
+def main(argv=None):
+    args = parse_args(argv)
 
-    # First, try to extract digits
-    match = re.search(r'\d+', rooms_str)
-    if match:
-        try:
-            return int(match.group())
-        except ValueError:
-            logging.warning(f"Unable to convert extracted rooms to int: '{match.group()}' from original '{rooms_str}'")
-            return None
-
-    # If no digits, try to extract word number
-    words = rooms_str.split()
-    for word in words:
-        num = word_to_num(word)
-        if num is not None:
-            return num
-
-    # If no valid number found
-    logging.warning(f"No numeric value found in rooms string: '{rooms_str}'")
-    return None
-
-def main():
     # Setup logging
     setup_logging()
 
-    # Database connection details
-    DB_USERNAME = 'root'        # Default XAMPP MySQL username
-    DB_PASSWORD = ''            # Default XAMPP MySQL password is empty
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'     # Replace with your actual database name
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
 
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
-    # Create SQLAlchemy engine
+    # Get the shared SQLAlchemy engine
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
+        engine = get_engine(DB_NAME)
         logging.info("Database engine created successfully.")
     except Exception as e:
         logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
-    # Initialize MetaData
-    metadata = MetaData()
+    # Define table names
+    old_table_name = 'property'           # Old table
+    new_table_name = 'properties_new'     # New table
 
-    # Reflect existing tables
+    # Reflect only the two tables used here
     try:
-        metadata.reflect(bind=engine)
+        old_table, new_table = reflect_tables(engine, [old_table_name, new_table_name])
         logging.info("Database schema reflected successfully.")
+    except NoSuchTableError as e:
+        logging.error(f"Missing tables in the database: {e}")
+        sys.exit(1)
     except Exception as e:
         logging.error(f"Error reflecting metadata: {e}")
         sys.exit(1)
 
-    # Define table names
-    old_table_name = 'property'           # Old table
-    new_table_name = 'properties_new'     # New table
-
-    # Check if tables exist
-    missing_tables = []
-    for table_name in [old_table_name, new_table_name]:
-        if table_name not in metadata.tables:
-            missing_tables.append(table_name)
-    if missing_tables:
-        logging.error(f"Missing tables in the database: {', '.join(missing_tables)}")
-        sys.exit(1)
-
-    # Access tables
-    old_table = metadata.tables[old_table_name]
-    new_table = metadata.tables[new_table_name]
-
     # Create a session
     Session = sessionmaker(bind=engine)
     session = Session()
     logging.info("Database session created.")
 
-    # Query all records from old_table using mappings()
+    # Query the columns needed from old_table using mappings()
     try:
-        stmt = select(old_table)
+        stmt = select(old_table.c.ID, old_table.c.rooms, old_table.c.propertytype)
         results = session.execute(stmt).mappings().fetchall()
         logging.info(f"Fetched {len(results)} records from '{old_table_name}' table.")
     except Exception as e:
@@ -178,16 +124,25 @@ def main():
         logging.warning(f"No records found in '{old_table_name}' table to migrate.")
         sys.exit(0)
 
+    # Parse the rooms column once for all records
+    bedrooms_column = parse_rooms_column([record['rooms'] for record in results],
+                                         [record['propertytype'] for record in results])
+
+    if args.staging:
+        session.close()
+        try:
+            updated = apply_bedrooms_via_staging(engine, new_table, results, bedrooms_column)
+        except Exception as e:
+            logging.error(f"Error applying bedrooms through the staging table: {e}")
+            sys.exit(1)
+        logging.info(f"Bedroom fields updated successfully. {updated} of {total_records} records changed.")
+        return
+
     # Process each record
-    for idx, record in enumerate(results, start=1):
+    for idx, (record, bedrooms) in enumerate(zip(results, bedrooms_column), start=1):
         try:
             # Extract data from old record
             old_id = record['ID']
-            rooms = record['rooms']
-            propertytype = record['propertytype']
-
-            # Prepare data for properties_new
-            bedrooms = extract_numeric_rooms(rooms, propertytype)
 
             # Update the bedrooms field in properties_new
             update_stmt = (
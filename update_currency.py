@@ -1,17 +1,22 @@
 # update_currency.py
 
 import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select, update, and_
+from sqlalchemy import Table, select, update, and_, case
+from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import sys
+import argparse
 import logging
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from column_transforms import register_transform
+from partitioning import iter_id_chunks
+from db import get_engine
+from schema import get_table
+
+# Prices up to this value are quoted in USD, anything above in Ksh
+USD_PRICE_MIN = 0
+USD_PRICE_MAX = 10000
 
 def setup_logging():
     """
@@ -26,49 +31,97 @@ def setup_logging():
         ]
     )
 
-def main():
+@register_transform('currency', columns=['currency'], reads=['price'])
+def currency_transform(row):
+    """
+    Pipeline form of this script: infers the currency from the price.
+    """
+    price = row['price']
+    if price is None or price < USD_PRICE_MIN:
+        return {}
+    return {'currency': 'USD' if price <= USD_PRICE_MAX else 'Ksh'}
+
+def update_currency_pushdown(engine, table, chunk_size=50000):
+    """
+    Applies the currency rule with set-based UPDATEs, one per primary-key range:
+
+        UPDATE properties_new
+        SET currency = CASE WHEN price <= 10000 THEN 'USD' ELSE 'Ksh' END
+        WHERE id BETWEEN :low AND :high AND price >= 0
+          AND currency IS DISTINCT FROM <that CASE>
+
+    Each range is committed on its own to keep lock time short.
+
+    Returns:
+        int: Total number of rows changed.
+    """
+    currency_rule = case((table.c.price <= USD_PRICE_MAX, 'USD'), else_='Ksh')
+    total_updated = 0
+    with engine.connect() as connection:
+        for low, high in list(iter_id_chunks(connection, table.c.id, chunk_size)):
+            stmt = (
+                update(table)
+                .where(table.c.id.between(low, high))
+                .where(table.c.price >= USD_PRICE_MIN)
+                .where(table.c.currency.is_distinct_from(currency_rule))
+                .values(currency=currency_rule, updated_at=datetime.now())
+            )
+            result = connection.execute(stmt)
+            connection.commit()
+            total_updated += result.rowcount
+            logging.info(f"IDs {low}-{high}: updated {result.rowcount} records (total {total_updated}).")
+    return total_updated
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the currency update.
+    """
+    parser = argparse.ArgumentParser(description="Set properties_new.currency to 'USD' or 'Ksh' from the price.")
+    parser.add_argument('--pushdown', action='store_true',
+                        help="Run the rule as chunked set-based UPDATEs in the database instead of one UPDATE per row.")
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help="Primary-key range covered by each pushdown UPDATE (default: 50000).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Setup logging
     setup_logging()
 
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'  # Updated database name
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
 
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
-
-    # Create SQLAlchemy engine
+    # Get the shared SQLAlchemy engine
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
+        engine = get_engine(DB_NAME)
         logging.info("Database engine created successfully.")
     except Exception as e:
         logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
-    # Initialize MetaData
-    metadata = MetaData()
-
-    # Reflect existing tables
-    try:
-        metadata.reflect(bind=engine)
-        logging.info("Database schema reflected successfully.")
-    except Exception as e:
-        logging.error(f"Error reflecting metadata: {e}")
-        sys.exit(1)
-
     # Define table names
     table_name = 'properties_new'    # Table to update
 
-    # Check if table exists
-    if table_name not in metadata.tables:
+    # Reflect only the table used here
+    try:
+        table = get_table(engine, table_name)
+        logging.info(f"Table '{table_name}' reflected successfully.")
+    except NoSuchTableError:
         logging.error(f"Table '{table_name}' does not exist in the database.")
         sys.exit(1)
+    except Exception as e:
+        logging.error(f"Error reflecting metadata: {e}")
+        sys.exit(1)
 
-    # Access table
-    table = metadata.tables[table_name]
+    if args.pushdown:
+        try:
+            total_updated = update_currency_pushdown(engine, table, chunk_size=args.chunk_size)
+        except Exception as e:
+            logging.error(f"Error updating currency in '{table_name}': {e}")
+            sys.exit(1)
+        logging.info(f"Currency column updated successfully. {total_updated} records changed.")
+        return
 
     # Create a session
     Session = sessionmaker(bind=engine)
@@ -76,8 +129,8 @@ def main():
     logging.info("Database session created.")
 
     # Define the price range
-    price_min = 0
-    price_max = 10000
+    price_min = USD_PRICE_MIN
+    price_max = USD_PRICE_MAX
 
     # Query records where price is between 0 and 10,000 inclusive
     try:
@@ -1,149 +1,123 @@
 import sys
-from sqlalchemy import create_engine, MetaData, Table, select, update
+import argparse
+from sqlalchemy import Table, select, update, insert, func
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, NoSuchTableError
+
+from db import get_engine
+from schema import reflect_tables
 
 # ---------------------- Configuration ----------------------
 
-# Database configuration - replace with your actual credentials
-DB_USER = 'root'
-DB_PASSWORD = ''
-DB_HOST = 'localhost'        # e.g., 'localhost' or '127.0.0.1'
-DB_PORT = '3306'                # Default MySQL port
+# Logical database from config.py; credentials and the MySQL driver live there too
 DB_NAME = 'archstone_test'
 
-# Choose your MySQL driver: 'mysqlconnector' or 'pymysql'
-# Ensure you have installed the corresponding package:
-# For 'mysqlconnector': pip install mysql-connector-python
-# For 'pymysql': pip install pymysql
-DRIVER = 'mysqlconnector'  # or 'pymysql'
-
-# Create the database URL based on the chosen driver
-if DRIVER == 'mysqlconnector':
-    DATABASE_URL = f'mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-elif DRIVER == 'pymysql':
-    DATABASE_URL = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-else:
-    print("Unsupported DRIVER specified. Choose 'mysqlconnector' or 'pymysql'.")
-    sys.exit(1)
-
-# ---------------------- Initialize Engine and Session ----------------------
-
-# Initialize the database engine
-engine = create_engine(DATABASE_URL, echo=False)
-
-# Create a configured "Session" class
-Session = sessionmaker(bind=engine)
-
-# Create a Session
-session = Session()
-
-# ---------------------- Reflect Tables ----------------------
-
-# Reflect the existing tables
-metadata = MetaData()
-try:
-    metadata.reflect(bind=engine)
-except SQLAlchemyError as e:
-    print(f"Error reflecting database metadata: {e}")
-    sys.exit(1)
-
-# Check if required tables exist
-required_tables = ['properties', 'locations']
-for table_name in required_tables:
-    if table_name not in metadata.tables:
-        print(f"Error: Required table '{table_name}' does not exist in the database.")
+# ---------------------- Main Function ----------------------
+
+def normalized(column):
+    """
+    SQL expression for the case- and whitespace-insensitive form of a name column.
+    """
+    return func.lower(func.trim(column))
+
+def parse_args(argv=None):
+    """
+    Parses command-line options; the script never prompts, so it can run from cron.
+    """
+    parser = argparse.ArgumentParser(description="Assign properties.location_id from the locations table.")
+    parser.add_argument('--add-missing', action='store_true',
+                        help="Insert property locations that have no entry in 'locations' before assigning IDs.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # ---------------------- Initialize Engine and Session ----------------------
+
+    # Initialize the database engine
+    try:
+        engine = get_engine(DB_NAME)
+    except Exception as e:
+        print(f"Error creating engine: {e}")
         sys.exit(1)
 
-# Define the tables
-properties = metadata.tables['properties']
-locations = metadata.tables['locations']
+    # ---------------------- Reflect Tables ----------------------
 
-# ---------------------- Main Function ----------------------
+    # Reflect only the required tables
+    try:
+        properties, locations = reflect_tables(engine, ['properties', 'locations'])
+    except NoSuchTableError as e:
+        print(f"Error: Required table(s) do not exist in the database: {e}")
+        sys.exit(1)
+    except SQLAlchemyError as e:
+        print(f"Error reflecting database metadata: {e}")
+        sys.exit(1)
+
+    # Create a Session
+    Session = sessionmaker(bind=engine)
+    session = Session()
 
-def main():
     try:
         # ---------------------- Step 1: Fetch Unique Locations from Properties ----------------------
         print("Fetching unique locations from 'properties' table...")
-        unique_locations_query = select(properties.c.location).distinct().where(properties.c.location != None).where(properties.c.location != '')
-        result = session.execute(unique_locations_query)
-        
-        # Access the first column in each row (index 0 corresponds to 'location')
-        properties_locations = [row[0].strip().lower() for row in result.fetchall()]
-        
+        unique_locations_query = select(normalized(properties.c.location)).distinct().where(properties.c.location != None).where(properties.c.location != '')
+        properties_locations = {row[0] for row in session.execute(unique_locations_query) if row[0]}
         print(f"Found {len(properties_locations)} unique locations in 'properties' table.")
 
-        # ---------------------- Step 2: Fetch All Locations from Locations Table ----------------------
+        # ---------------------- Step 2: Fetch All Location Names from Locations Table ----------------------
         print("Fetching existing locations from 'locations' table...")
-        locations_query = select(locations.c.id, locations.c.name)
-        result = session.execute(locations_query)
-        
-        # Create a mapping from location name to id (case-insensitive)
-        # row[1] is 'name', row[0] is 'id'
-        location_map = {row[1].strip().lower(): row[0] for row in result.fetchall()}
-        
-        print(f"Fetched {len(location_map)} locations from 'locations' table.")
+        known_locations = {row[0] for row in session.execute(select(normalized(locations.c.name)).distinct())}
+        print(f"Fetched {len(known_locations)} distinct names from 'locations' table.")
 
         # ---------------------- Step 3: Identify Unmatched Locations ----------------------
-        unmatched_locations = set()
-        for loc in properties_locations:
-            if loc not in location_map:
-                unmatched_locations.add(loc)
-        
+        unmatched_locations = sorted(properties_locations - known_locations)
         print(f"Found {len(unmatched_locations)} unmatched locations.")
 
-        # ---------------------- Step 4: Update location_id for Matched Locations ----------------------
-        matched_locations = set(properties_locations) - unmatched_locations
-        for loc in matched_locations:
-            loc_id = location_map[loc]
-            # Update properties where location matches
-            update_stmt = (
-                update(properties).
-                where(properties.c.location == loc).
-                values(location_id=loc_id)
-            )
-            session.execute(update_stmt)
-            print(f"Updated 'location_id' for properties with location '{loc}' to {loc_id}.")
-
-        # Commit the updates for matched locations
-        session.commit()
-        print("All matched 'location_id' fields have been updated.")
-
-        # ---------------------- Step 5: Handle Unmatched Locations ----------------------
+        # ---------------------- Step 4: Add Unmatched Locations in Bulk ----------------------
         if unmatched_locations:
             print("\nThe following locations in 'properties' table did not have a matching entry in 'locations' table:")
             for loc in unmatched_locations:
                 print(f"- {loc}")
 
-            add_missing = input("\nDo you want to add these unmatched locations to the 'locations' table? (y/n): ").strip().lower()
-            if add_missing == 'y':
-                for loc in unmatched_locations:
-                    # Insert the new location
-                    insert_stmt = locations.insert().values(name=loc.title())  # Capitalize for consistency
-                    result = session.execute(insert_stmt)
-                    new_loc_id = result.inserted_primary_key[0]
-                    print(f"Added location '{loc}' with ID {new_loc_id}.")
-
-                    # Update properties with the new location_id
-                    update_stmt = (
-                        update(properties).
-                        where(properties.c.location == loc).
-                        values(location_id=new_loc_id)
-                    )
-                    session.execute(update_stmt)
-                    print(f"Updated properties with location '{loc}' to 'location_id' {new_loc_id}.")
-
-                # Commit the new inserts and updates
-                session.commit()
-                print("All unmatched locations have been added and updated.")
+            if args.add_missing:
+                # One multi-row INSERT for all of them, capitalized for consistency
+                session.execute(insert(locations), [{'name': loc.title()} for loc in unmatched_locations])
+
+                # Re-read the new IDs in one query
+                added = session.execute(
+                    select(locations.c.id, locations.c.name)
+                    .where(normalized(locations.c.name).in_(unmatched_locations))
+                ).fetchall()
+                for loc_id, name in added:
+                    print(f"Added location '{name}' with ID {loc_id}.")
             else:
-                print("Unmatched locations were not added. Please handle them manually.")
+                print("Unmatched locations were not added. Re-run with --add-missing to insert them.")
         else:
             print("All locations matched successfully.")
 
+        # ---------------------- Step 5: Assign location_id with One UPDATE ... JOIN ----------------------
+        # Duplicate names in 'locations' resolve to the lowest ID
+        location_ids = (
+            select(normalized(locations.c.name).label('name_key'), func.min(locations.c.id).label('id'))
+            .group_by(normalized(locations.c.name))
+            .subquery('location_ids')
+        )
+        update_stmt = (
+            update(properties)
+            .where(normalized(properties.c.location) == location_ids.c.name_key)
+            .where(properties.c.location_id.is_distinct_from(location_ids.c.id))
+            .values(location_id=location_ids.c.id)
+        )
+        result = session.execute(update_stmt)
+
+        # Commit the inserts and the update together
+        session.commit()
+        print(f"Updated 'location_id' on {result.rowcount} properties.")
+
     except SQLAlchemyError as e:
         print(f"An error occurred: {e}")
         session.rollback()
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\nProcess interrupted by user.")
         session.rollback()
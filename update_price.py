@@ -1,17 +1,27 @@
 # update_price.py
 
-import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select, update, and_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update, and_, func
+from sqlalchemy.exc import NoSuchTableError
 from datetime import datetime
 import sys
+import argparse
 import logging
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from checkpoints import ensure_checkpoint_table, load_checkpoint, save_checkpoint, clear_checkpoint
+from column_transforms import register_transform
+from partitioning import iter_id_chunks
+from db import get_engine
+from schema import get_table
+
+# Completed ID ranges are recorded under this checkpoint job name, shared with
+# the 'price' transform of transform_pipeline.py. migrate_properties.py clears
+# it when it migrates 'properties_new' from scratch.
+JOB_NAME = 'update_price'
+
+# Prices in this range were entered in millions and are scaled up
+PRICE_MIN = 0
+PRICE_MAX = 200
+PRICE_MULTIPLIER = 1000000
 
 def setup_logging():
     """
@@ -26,114 +36,130 @@ def setup_logging():
         ]
     )
 
-def main():
+@register_transform('price', columns=['price'], checkpoint=JOB_NAME)
+def price_transform(row):
+    """
+    Pipeline form of this script: scales prices entered in millions. Shares
+    this script's checkpoint, so no row is scaled twice by either.
+    """
+    price = row['price']
+    if price is not None and PRICE_MIN <= price <= PRICE_MAX:
+        return {'price': price * PRICE_MULTIPLIER}
+    return {}
+
+def warn_if_checkpoint_stale(connection, table, last_id, price_in_range):
+    """
+    Warns when the checkpoint already covers every row but positive prices in
+    range remain below it, which means 'properties_new' was reloaded without
+    the checkpoint being cleared (a rescaled price is never in range again).
+    """
+    max_id = connection.execute(select(func.max(table.c.id))).scalar()
+    if max_id is None or last_id < max_id:
+        return
+    stmt = (
+        select(func.count()).select_from(table)
+        .where(price_in_range).where(table.c.price > 0).where(table.c.id <= last_id)
+    )
+    unscaled = connection.execute(stmt).scalar()
+    if unscaled:
+        logging.warning(f"The checkpoint covers every row up to ID {max_id}, yet {unscaled} records still have "
+                        f"prices between {PRICE_MIN} and {PRICE_MAX}. If '{table.name}' was re-migrated, "
+                        f"rerun with --reset.")
+
+def parse_args(argv=None):
+    """
+    Parses command-line options for the price rescaling.
+    """
+    parser = argparse.ArgumentParser(
+        description=f"Multiply properties_new prices between {PRICE_MIN} and {PRICE_MAX} by {PRICE_MULTIPLIER}, once.")
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help="Primary-key range covered by each UPDATE; smaller ranges hold locks for less time (default: 10000).")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report how many records would be rescaled.")
+    parser.add_argument('--reset', action='store_true',
+                        help="Forget which ID ranges were already rescaled and start from the first row.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Setup logging
     setup_logging()
 
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'  # Updated database name
-
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
 
-    # Create SQLAlchemy engine
+    # Get the shared SQLAlchemy engine
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
+        engine = get_engine(DB_NAME)
         logging.info("Database engine created successfully.")
     except Exception as e:
         logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
-    # Initialize MetaData
-    metadata = MetaData()
-
-    # Reflect existing tables
-    try:
-        metadata.reflect(bind=engine)
-        logging.info("Database schema reflected successfully.")
-    except Exception as e:
-        logging.error(f"Error reflecting metadata: {e}")
-        sys.exit(1)
-
     # Define table names
     table_name = 'properties_new'    # Table to update
 
-    # Check if table exists
-    if table_name not in metadata.tables:
+    # Reflect only the table used here
+    try:
+        table = get_table(engine, table_name)
+        logging.info(f"Table '{table_name}' reflected successfully.")
+    except NoSuchTableError:
         logging.error(f"Table '{table_name}' does not exist in the database.")
         sys.exit(1)
-
-    # Access table
-    table = metadata.tables[table_name]
-
-    # Create a session
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    logging.info("Database session created.")
+    except Exception as e:
+        logging.error(f"Error reflecting metadata: {e}")
+        sys.exit(1)
 
     # Define the price range
-    price_min = 0
-    price_max = 200
+    price_min = PRICE_MIN
+    price_max = PRICE_MAX
+    price_in_range = and_(table.c.price >= price_min, table.c.price <= price_max)
 
-    # Query records where price is between 0 and 200 inclusive
     try:
-        stmt = select(table).where(and_(table.c.price >= price_min, table.c.price <= price_max))
-        results = session.execute(stmt).mappings().fetchall()
-        logging.info(f"Fetched {len(results)} records with price between {price_min} and {price_max}.")
+        ensure_checkpoint_table(engine)
+        with engine.connect() as connection:
+            if args.reset and not args.dry_run:
+                clear_checkpoint(connection, JOB_NAME)
+                connection.commit()
+            last_id = None if args.reset else load_checkpoint(connection, JOB_NAME)
+            if last_id is not None:
+                logging.info(f"Records up to ID {last_id} were already rescaled; continuing after it.")
+                warn_if_checkpoint_stale(connection, table, last_id, price_in_range)
+
+            if args.dry_run:
+                stmt = select(func.count()).select_from(table).where(price_in_range)
+                if last_id is not None:
+                    stmt = stmt.where(table.c.id > last_id)
+                pending = connection.execute(stmt).scalar()
+                logging.info(f"Dry run: {pending} records with price between {price_min} and {price_max} would be rescaled.")
+                return
+
+            total_updated = 0
+            for low, high in list(iter_id_chunks(connection, table.c.id, args.chunk_size)):
+                if last_id is not None:
+                    if high <= last_id:
+                        continue
+                    low = max(low, last_id + 1)
+
+                # Rescale the chunk and record it as done in one transaction,
+                # so a rerun can never multiply the same rows twice
+                update_stmt = (
+                    update(table)
+                    .where(table.c.id.between(low, high))
+                    .where(price_in_range)
+                    .values(price=table.c.price * PRICE_MULTIPLIER, updated_at=datetime.now())
+                )
+                result = connection.execute(update_stmt)
+                save_checkpoint(connection, JOB_NAME, high)
+                connection.commit()
+                total_updated += result.rowcount
+                logging.info(f"IDs {low}-{high}: updated {result.rowcount} records (total {total_updated}).")
     except Exception as e:
-        logging.error(f"Error fetching data from '{table_name}': {e}")
+        logging.error(f"Error updating prices in '{table_name}': {e}")
         sys.exit(1)
 
-    total_records = len(results)
-    if total_records == 0:
-        logging.warning(f"No records found in '{table_name}' table with price between {price_min} and {price_max}.")
-        sys.exit(0)
-
-    # Process each record
-    for idx, record in enumerate(results, start=1):
-        try:
-            # Extract data from current record
-            property_id = record['id']
-            original_price = record['price']
-
-            # Check if price is not None
-            if original_price is None:
-                logging.warning(f"Record ID {property_id} has NULL price. Skipping.")
-                continue
-
-            # Calculate the new price
-            new_price = original_price * 1000000
-
-            # Prepare update statement
-            update_stmt = (
-                update(table)
-                .where(table.c.id == property_id)
-                .values(
-                    price=new_price,
-                    updated_at=datetime.now()
-                )
-            )
-
-            # Execute update
-            session.execute(update_stmt)
-
-            # Commit every 100 records or at the end
-            if idx % 100 == 0 or idx == total_records:
-                session.commit()
-                logging.info(f"Updated {idx}/{total_records} records.")
-
-        except Exception as e:
-            session.rollback()
-            logging.error(f"Error updating record {idx} (ID: {record['id']}): {e}")
-
-    # Close the session
-    session.close()
-    logging.info("Database session closed.")
-    logging.info("Price column updated successfully.")
+    logging.info(f"Price column updated successfully. {total_updated} records rescaled.")
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,17 @@
 # update_property_type.py
 
 import sqlalchemy
-from sqlalchemy import create_engine, MetaData, Table, select, update
+from sqlalchemy import Table, select, update, func, case
+from sqlalchemy.exc import SQLAlchemyError, NoSuchTableError
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import sys
 import logging
+from collections import Counter
 
-def create_db_url(username, password, host, port, database):
-    """
-    Constructs the database URL for SQLAlchemy.
-    """
-    return f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
+from column_transforms import register_transform
+from db import get_engine
+from schema import get_table
 
 def setup_logging():
     """
@@ -26,6 +26,13 @@ def setup_logging():
         ]
     )
 
+# Keywords for 'buy' and 'rent' mapping, casefolded for a single hash lookup
+BUY_KEYWORDS = ['for sale', 'plot for sale', 'sale', 'buy', 'purchase']
+RENT_KEYWORDS = ['rental', 'rentals', 'rent']
+
+PROPERTY_TYPE_LOOKUP = {keyword: 'buy' for keyword in BUY_KEYWORDS}
+PROPERTY_TYPE_LOOKUP.update({keyword: 'rent' for keyword in RENT_KEYWORDS})
+
 def determine_property_type(original_type):
     """
     Determines the standardized property type ('buy' or 'rent') based on the original property_type text.
@@ -38,157 +45,98 @@ def determine_property_type(original_type):
     """
     if not original_type:
         return None
+    return PROPERTY_TYPE_LOOKUP.get(original_type.strip().casefold())
 
-    original_type_clean = original_type.strip()
-
-    # Keywords for 'buy' and 'rent' mapping
-    buy_keywords = [
-        'For Sale', 'FOR SALE', 'for sale',
-        'Plot for sale', 'Plot For Sale', 'plot for sale',
-        'Sale', 'SALE',
-        'Buy', 'BUY', 'buy',
-        'Purchase', 'PURCHASE', 'purchase'
-    ]
-
-    rent_keywords = [
-        'Rental', 'RENTAL', 'rental',
-        'Rentals', 'RENTALS', 'rentals',
-        'Rent', 'RENT', 'rent'
-    ]
-
-    # Determine new property_type based on keywords
-    if original_type_clean in buy_keywords:
-        logging.info(f"Matched '{original_type_clean}' to 'buy'")
-        return 'buy'
-    elif original_type_clean in rent_keywords:
-        logging.info(f"Matched '{original_type_clean}' to 'rent'")
-        return 'rent'
-
-    logging.warning(f"No matching keyword found for property_type: '{original_type_clean}'")
-    return None
+@register_transform('property_type', columns=['property_type'])
+def property_type_transform(row):
+    """
+    Pipeline form of this script: normalizes property_type to 'buy'/'rent' (NULL if unrecognized).
+    """
+    original_property_type = row['property_type']
+    new_property_type = determine_property_type(original_property_type)
+    if original_property_type and new_property_type == original_property_type.strip().lower():
+        return {}
+    return {'property_type': new_property_type}
 
 def main():
     # Setup logging
     setup_logging()
 
-    # Database connection details
-    DB_USERNAME = 'root'        # Replace with your MySQL username
-    DB_PASSWORD = ''            # Replace with your MySQL password
-    DB_HOST = 'localhost'
-    DB_PORT = '3306'            # Default MySQL port
-    DB_NAME = 'archstone_test'     # Replace with your actual database name
+    # Logical database from config.py
+    DB_NAME = 'archstone_test'
 
-    # Create database URL
-    DATABASE_URL = create_db_url(DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
-
-    # Create SQLAlchemy engine
+    # Get the shared SQLAlchemy engine
     try:
-        engine = create_engine(DATABASE_URL, echo=False)
+        engine = get_engine(DB_NAME)
         logging.info("Database engine created successfully.")
     except Exception as e:
         logging.error(f"Error creating engine: {e}")
         sys.exit(1)
 
-    # Initialize MetaData
-    metadata = MetaData()
-
-    # Reflect existing tables
-    try:
-        metadata.reflect(bind=engine)
-        logging.info("Database schema reflected successfully.")
-    except Exception as e:
-        logging.error(f"Error reflecting metadata: {e}")
-        sys.exit(1)
-
     # Define table names
     new_table_name = 'properties_new'    # New table
 
-    # Check if table exists
-    if new_table_name not in metadata.tables:
+    # Reflect only the table used here
+    try:
+        new_table = get_table(engine, new_table_name)
+        logging.info(f"Table '{new_table_name}' reflected successfully.")
+    except NoSuchTableError:
         logging.error(f"Table '{new_table_name}' does not exist in the database.")
         sys.exit(1)
-
-    # Access table
-    new_table = metadata.tables[new_table_name]
-
-    # Create a session
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    logging.info("Database session created.")
-
-    # Query all records from new_table using mappings()
-    try:
-        stmt = select(new_table)
-        results = session.execute(stmt).mappings().fetchall()
-        logging.info(f"Fetched {len(results)} records from '{new_table_name}' table.")
     except Exception as e:
-        logging.error(f"Error fetching data from '{new_table_name}': {e}")
+        logging.error(f"Error reflecting metadata: {e}")
         sys.exit(1)
 
-    total_records = len(results)
-    if total_records == 0:
-        logging.warning(f"No records found in '{new_table_name}' table to update.")
-        sys.exit(0)
-
-    # Process each record
-    for idx, record in enumerate(results, start=1):
-        try:
-            # Extract data from current record
-            property_id = record['id']
-            original_property_type = record['property_type']
-
-            # Determine the new property_type
-            new_property_type = determine_property_type(original_property_type)
-
-            # Compare only if original_property_type is not None
-            if original_property_type:
-                original_property_type_clean = original_property_type.strip()
-                if new_property_type and new_property_type == original_property_type_clean.lower():
+    # Each distinct value is classified once, together with its row count
+    try:
+        with engine.connect() as connection:
+            stmt = select(new_table.c.property_type, func.count()).group_by(new_table.c.property_type)
+            distinct_values = connection.execute(stmt).fetchall()
+            logging.info(f"Fetched {len(distinct_values)} distinct property_type values from '{new_table_name}' table.")
+
+            if not distinct_values:
+                logging.warning(f"No records found in '{new_table_name}' table to update.")
+                sys.exit(0)
+
+            match_counts = Counter()
+            unmatched = []
+            new_values = {}
+            for original_property_type, row_count in distinct_values:
+                if original_property_type is None:
+                    match_counts['null'] += row_count
                     continue
+                new_property_type = determine_property_type(original_property_type)
+                if new_property_type is None:
+                    match_counts['no match'] += row_count
+                    unmatched.append((original_property_type, row_count))
+                else:
+                    match_counts[new_property_type] += row_count
+                # Values already in their normalized form are left alone
+                if new_property_type != original_property_type.strip().lower():
+                    new_values[original_property_type] = new_property_type
+
+            # Apply every change in one UPDATE ... CASE (unmatched values become NULL)
+            updated = 0
+            if new_values:
+                update_stmt = (
+                    update(new_table)
+                    .where(new_table.c.property_type.in_(list(new_values)))
+                    .values(
+                        property_type=case(new_values, value=new_table.c.property_type),
+                        updated_at=datetime.now()
+                    )
+                )
+                updated = connection.execute(update_stmt).rowcount
+                connection.commit()
+    except SQLAlchemyError as e:
+        logging.error(f"Error updating property_type in '{new_table_name}': {e}")
+        sys.exit(1)
 
-            # If new_property_type is None, decide whether to skip or set to NULL
-            if new_property_type is None:
-                # Option 1: Skip updating
-                # continue
-
-                # Option 2: Set to NULL
-                update_values = {
-                    'property_type': None,
-                    'updated_at': datetime.now()
-                }
-            else:
-                update_values = {
-                    'property_type': new_property_type,
-                    'updated_at': datetime.now()
-                }
-
-            # Prepare update statement
-            update_stmt = (
-                update(new_table)
-                .where(new_table.c.id == property_id)
-                .values(**update_values)
-            )
-
-            # Execute update
-            session.execute(update_stmt)
-
-            # Commit every 100 records or at the end
-            if idx % 100 == 0 or idx == total_records:
-                session.commit()
-                logging.info(f"Updated {idx}/{total_records} records.")
-
-        except AttributeError as ae:
-            # Handle cases where original_property_type is None
-            logging.error(f"AttributeError for record {idx} (ID: {record['id']}): {ae}")
-            continue
-        except Exception as e:
-            session.rollback()
-            logging.error(f"Error updating record {idx} (ID: {record['id']}): {e}")
-
-    # Close the session
-    session.close()
-    logging.info("Database session closed.")
-    logging.info("Property type fields updated successfully.")
+    logging.info(f"Matched 'buy': {match_counts['buy']} records, 'rent': {match_counts['rent']} records, "
+                 f"no match: {match_counts['no match']} records, NULL: {match_counts['null']} records.")
+    for original_property_type, row_count in unmatched:
+        logging.warning(f"No matching keyword found for property_type '{original_property_type.strip()}' ({row_count} records); set to NULL.")
+    logging.info(f"Property type fields updated successfully. {updated} records changed.")
 
 if __name__ == "__main__":
     main()
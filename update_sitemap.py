@@ -67,9 +67,13 @@ sitemap_file = "sitemap.xml"
 crawled_file = "crawled_urls.csv"
 output_file = "updated_sitemap.xml"
 
-# Load existing sitemap and crawled URLs
-sitemap_root, namespace, existing_urls = load_sitemap(sitemap_file)
-crawled_urls = load_crawled_urls(crawled_file)
+def main():
+    # Load existing sitemap and crawled URLs
+    sitemap_root, namespace, existing_urls = load_sitemap(sitemap_file)
+    crawled_urls = load_crawled_urls(crawled_file)
 
-if sitemap_root and namespace:
-    update_sitemap(sitemap_root, namespace, existing_urls, crawled_urls, output_file)
+    if sitemap_root and namespace:
+        update_sitemap(sitemap_root, namespace, existing_urls, crawled_urls, output_file)
+
+if __name__ == "__main__":
+    main()